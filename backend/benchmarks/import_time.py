@@ -0,0 +1,80 @@
+# backend/benchmarks/import_time.py
+# 冷启动导入耗时基准：在新进程中用 -X importtime 导入模块，按模块统计耗时
+#
+# 用法（在 backend 目录下运行）：
+#   python benchmarks/import_time.py                  # 统计 main 的导入耗时
+#   python benchmarks/import_time.py -m services.document_processor --top 15
+#   python benchmarks/import_time.py --runs 5         # 多次运行取中位数
+import os
+import re
+import sys
+import time
+import argparse
+import subprocess
+from statistics import median
+from typing import Dict, List, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# -X importtime 输出格式：import time: self [us] | cumulative | imported package
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+# 应只在首次使用时导入的重依赖
+HEAVY_MODULES = ["docx", "pptx", "pypdf", "markdown", "bs4", "google.generativeai", "google.cloud.translate_v3"]
+
+
+def measure(module: str) -> Tuple[float, Dict[str, Tuple[int, int, int]]]:
+    """在子进程中导入 module，返回 (墙钟耗时秒数, {模块名: (self_us, cumulative_us, 嵌套深度)})"""
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True
+    )
+    elapsed = time.perf_counter() - started
+    if proc.returncode != 0:
+        raise SystemExit(f"Importing {module} failed:\n{proc.stderr[-2000:]}")
+
+    modules: Dict[str, Tuple[int, int, int]] = {}
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules[name] = (int(self_us), int(cumulative_us), len(indent) // 2)
+    return elapsed, modules
+
+
+def report(module: str, runs: int, top: int):
+    results: List[Tuple[float, Dict[str, Tuple[int, int, int]]]] = [measure(module) for _ in range(runs)]
+    wall = median(elapsed for elapsed, _ in results)
+    # 取最后一次运行的明细（前几次已预热文件系统缓存）
+    modules = results[-1][1]
+    total_us = modules.get(module, (0, sum(m[0] for m in modules.values()), 0))[1]
+
+    print(f"import {module}: {wall * 1000:.1f} ms wall (median of {runs}), {total_us / 1000:.1f} ms in imports, {len(modules)} modules")
+    print()
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    ranked = sorted(modules.items(), key=lambda item: item[1][1], reverse=True)
+    for name, (self_us, cumulative_us, _) in ranked[:top]:
+        print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {name}")
+
+    loaded = [name for name in HEAVY_MODULES if name in modules]
+    print()
+    if loaded:
+        print("Heavy modules imported eagerly: " + ", ".join(loaded))
+    else:
+        print("No heavy document/Gemini/Google modules imported at startup")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure per-module import time of the backend")
+    parser.add_argument("-m", "--module", default="main", help="module to import (default: main)")
+    parser.add_argument("--runs", type=int, default=3, help="number of cold imports to run")
+    parser.add_argument("--top", type=int, default=25, help="number of slowest modules to list")
+    args = parser.parse_args()
+    report(args.module, max(1, args.runs), args.top)
+
+
+if __name__ == "__main__":
+    main()
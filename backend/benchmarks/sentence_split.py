@@ -0,0 +1,110 @@
+# backend/benchmarks/sentence_split.py
+# 句子切分基准：对比 DocumentChunker.split_by_sentences（SentenceSegmenter）与改动前的 re.split 实现
+#
+# 用法（在 backend 目录下运行）：
+#   python benchmarks/sentence_split.py                  # 1 / 4 / 16 MB 中英文混排文本，每项取 5 次的中位数
+#   python benchmarks/sentence_split.py --sizes 8 --runs 5
+import gc
+import os
+import re
+import sys
+import time
+import argparse
+from statistics import median
+from typing import Callable, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.document_chunker import DocumentChunker, _ChunkPacker  # noqa: E402
+
+MB = 1024 * 1024
+
+PARAGRAPHS = [
+    "集装箱运输的运费按体积计算。收货人需要在到港前清关！如有疑问，请联系代理？",
+    "Freight is charged by volume. Customs clearance is required before arrival! Version 2.0 applies?",
+    "- 提单正本三份\n- 商业发票\n- Packing list",
+    "Pengiriman kontainer dihitung berdasarkan volume. Penerima harus mengurus bea cukai.",
+]
+
+
+def legacy_split_by_sentences(text: str) -> List[str]:
+    """改动前的实现，仅用于对比"""
+    paragraphs = text.split('\n\n')
+    sentences = []
+    for paragraph in paragraphs:
+        if not paragraph.strip():
+            continue
+        if re.match(r'^\s*[-*•]\s', paragraph):
+            items = paragraph.split('\n')
+            sentences.extend(items)
+        else:
+            for sent in re.split(r'([.。!！?？])\s*', paragraph):
+                if sent.strip():
+                    sentences.append(sent.strip())
+    return sentences
+
+
+def legacy_create_chunks(text: str, max_chunk_size: int) -> List[str]:
+    """改动前的 create_chunks：旧切分结果交给同一个装箱器"""
+    packer = _ChunkPacker(max_chunk_size, 2)
+    chunks = []
+    for sentence in legacy_split_by_sentences(text):
+        chunks.extend(packer.add(sentence))
+    chunks.extend(packer.finish())
+    return chunks
+
+
+def build_text(size_mb: int) -> str:
+    unit = '\n\n'.join(PARAGRAPHS) + '\n\n'
+    return unit * max(1, size_mb * MB // len(unit.encode('utf-8')))
+
+
+def timed(split: Callable[[str], list], text: str, runs: int) -> tuple:
+    """返回 (耗时中位数秒数, 结果)；与 timeit 相同，计时期间关闭 GC，避免大量小对象触发的回收干扰结果"""
+    times = []
+    result = None
+    for _ in range(runs):
+        result = None
+        gc.collect()
+        gc.disable()
+        try:
+            started = time.perf_counter()
+            result = split(text)
+            times.append(time.perf_counter() - started)
+        finally:
+            gc.enable()
+    return median(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sentence splitting")
+    parser.add_argument("--sizes", default="1,4,16", help="input sizes in MB, comma separated")
+    parser.add_argument("--runs", type=int, default=5, help="runs per measurement, the median is reported")
+    args = parser.parse_args()
+
+    chunker = DocumentChunker()
+    punctuation_only = re.compile(r'^[.。!！?？]+$')
+    impls = [
+        ("legacy", legacy_split_by_sentences),
+        ("split", chunker.split_by_sentences),
+        ("spans", chunker.sentence_spans),
+        # 端到端：切分 + 装箱，旧实现的标点碎片也要逐个经过装箱器
+        ("legacy-chunks", lambda text: legacy_create_chunks(text, chunker.max_chunk_size)),
+        ("chunks", chunker.create_chunks),
+    ]
+
+    print(f"{'size':>6} {'impl':>13} {'seconds':>9} {'MB/s':>8} {'items':>10} {'punct-only':>11}")
+    for size in (int(size) for size in args.sizes.split(",") if size):
+        text = build_text(size)
+        actual_mb = len(text.encode('utf-8')) / MB
+        for name, split in impls:
+            elapsed, result = timed(split, text, args.runs)
+            if name == "spans":
+                bogus = sum(1 for start, end in result if punctuation_only.match(text, start, end))
+            else:
+                bogus = sum(1 for sentence in result if punctuation_only.match(sentence))
+            print(f"{size:>4}MB {name:>13} {elapsed:>9.3f} {actual_mb / elapsed:>8.1f} {len(result):>10} {bogus:>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# backend/benchmarks/stream_chunks.py
+# 流式分块基准：验证 DocumentChunker.stream_chunks 的耗时随输入线性增长、内存有界、多字节字符不丢失
+#
+# 用法（在 backend 目录下运行）：
+#   python benchmarks/stream_chunks.py                     # 1 / 10 / 100 MB，含标点和无标点两种输入
+#   python benchmarks/stream_chunks.py --sizes 1,10 --legacy-max-mb 10
+import os
+import io
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+from typing import Callable, Generator, Iterator
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.document_chunker import DocumentChunker  # noqa: E402
+
+MB = 1024 * 1024
+
+SAMPLES = {
+    # 中英文混排、有句末标点
+    "sentences": "集装箱运输的运费按体积计算。Freight is charged by volume! 收货人需要在到港前清关？Customs clearance is required. ",
+    # 没有任何句末标点（旧实现的最坏情况）
+    "no-punctuation": "集装箱 运输 运费 体积 freight consignee vessel cargo 收货人 清关 ",
+}
+
+
+def legacy_stream_chunks(chunker: DocumentChunker, file_obj: io.IOBase, chunk_size: int = 8192) -> Generator[str, None, None]:
+    """改动前的实现，仅用于对比"""
+    buffer = ""
+    while True:
+        chunk = file_obj.read(chunk_size)
+        if not chunk:
+            if buffer:
+                yield from chunker.create_chunks(buffer)
+            break
+        buffer += chunk.decode('utf-8', errors='ignore')
+        last_sentence_end = max(
+            buffer.rfind('.'), buffer.rfind('。'),
+            buffer.rfind('!'), buffer.rfind('！'),
+            buffer.rfind('?'), buffer.rfind('？')
+        )
+        if last_sentence_end != -1:
+            yield from chunker.create_chunks(buffer[:last_sentence_end + 1])
+            buffer = buffer[last_sentence_end + 1:]
+
+
+def write_sample(path: str, sample: str, size_mb: int) -> int:
+    """写入约 size_mb 的 UTF-8 文本，返回字符数"""
+    unit = sample.encode('utf-8')
+    repeats = max(1, size_mb * MB // len(unit))
+    block = unit * 1024
+    with open(path, 'wb') as f:
+        for _ in range(repeats // 1024):
+            f.write(block)
+        f.write(unit * (repeats % 1024))
+    return len(sample) * repeats
+
+
+def run(stream: Callable[[io.IOBase], Iterator[str]], path: str) -> tuple:
+    """返回 (耗时秒数, 峰值内存字节数, 块数, CJK 字符数)"""
+    tracemalloc.start()
+    started = time.perf_counter()
+    chunks = 0
+    cjk = 0
+    with open(path, 'rb') as f:
+        for chunk in stream(f):
+            chunks += 1
+            cjk += chunk.count('集')
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, chunks, cjk
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark DocumentChunker.stream_chunks")
+    parser.add_argument("--sizes", default="1,10,100", help="input sizes in MB, comma separated")
+    parser.add_argument("--legacy-max-mb", type=int, default=10, help="largest input to run the old implementation on")
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+
+    chunker = DocumentChunker()
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, sample in SAMPLES.items():
+            print(f"== {name}")
+            print(f"{'size':>6} {'impl':>8} {'seconds':>9} {'MB/s':>8} {'peak MiB':>9} {'chunks':>7}  CJK kept")
+            for size in sizes:
+                path = os.path.join(workdir, f"{name}-{size}.txt")
+                write_sample(path, sample, size)
+                # 含 '集' 的单元数量即为原文中的 '集' 字符数；分块的句子重叠会让计数偏多，但不应偏少
+                expected_cjk = sample.count('集') * (os.path.getsize(path) // len(sample.encode('utf-8')))
+                impls = [("new", lambda f: chunker.stream_chunks(f))]
+                if size <= args.legacy_max_mb:
+                    impls.append(("legacy", lambda f: legacy_stream_chunks(chunker, f)))
+                for impl, stream in impls:
+                    elapsed, peak, chunks, cjk = run(stream, path)
+                    print(
+                        f"{size:>4}MB {impl:>8} {elapsed:>9.2f} {size / elapsed:>8.1f} "
+                        f"{peak / MB:>9.1f} {chunks:>7}  {'yes' if cjk >= expected_cjk else 'NO'}"
+                    )
+                os.unlink(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,44 @@
 # backend/main.py
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Query, Body
-from fastapi.responses import Response
+from fastapi.responses import Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.background import BackgroundTask
 import httpx
 import os
 import asyncio
 from dotenv import load_dotenv
-from typing import Optional, Dict
+from typing import Callable, Optional, Dict, List, Tuple, Union, BinaryIO
 from abc import ABC, abstractmethod
 from enum import Enum
 import logging
 import traceback
 from datetime import datetime
+from contextlib import asynccontextmanager, aclosing
 from services.term_extractor import GeminiTermExtractor
 from services.glossary_manager import GlossaryManager
-from services.document_processor import DocumentProcessor
 from services.document_chunker import DocumentChunker
 import time
 import json
+import hashlib
+from urllib.parse import quote
 from sqlalchemy.orm import Session
 from fastapi import Depends
-from database import get_db
+from database import get_db, SessionLocal
+from models.glossary import Glossary
 from sqlalchemy.sql import text
 from services.local_glossary_manager import LocalGlossaryManager
+from services.http_client import init_http_client, close_http_client, get_http_client
+from services.job_queue import JobQueue, JobStatus, Job, JobError, QueueFullError
+from services.status_poller import DocumentStatusHub, format_sse
+from services.text_batcher import TextBatcher
+from services.translation_cache import TranslationCache, make_cache_key
+from services.extraction_pool import ExtractionPool, ExtractionQueueFullError, ExtractionTimeoutError
+from services.upload_spool import SpooledUpload, FileTooLargeError, spool_upload
+from services.extraction_cache import ExtractionCache
+from services.segment_table import SEPARATOR, SegmentTable
+from services.boilerplate import BoilerplateFilter
+from services.near_duplicate import NearDuplicateFilter
+from services.quota_governor import DeepLQuotaGovernor, QuotaExceededError, RateLimitedError
 
 # 加载环境变量
 load_dotenv()
@@ -43,6 +59,28 @@ class TranslatorType(str, Enum):
     DEEPL = "deepl"
     GOOGLE = "google"
 
+def get_mime_type(filename: str) -> str:
+    """根据文件扩展名获取 MIME 类型"""
+    ext = filename.lower().split('.')[-1]
+    mime_types = {
+        'pdf': 'application/pdf',
+        'docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+        'pptx': 'application/vnd.openxmlformats-officedocument.presentationml.presentation',
+        'txt': 'text/plain'
+    }
+    return mime_types.get(ext, 'application/octet-stream')
+
+# 在文件开头添加自定义异常类
+class CharacterLimitError(Exception):
+    """DeepL API character limit reached exception"""
+    pass
+
+class DeepLRequestError(Exception):
+    """DeepL API 返回非 200 响应"""
+    def __init__(self, status_code: int, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+
 # 翻译服务的抽象基类
 class TranslatorService(ABC):
     @abstractmethod
@@ -55,7 +93,9 @@ class TranslatorService(ABC):
 
 # DeepL翻译服务实现
 class DeepLTranslator(TranslatorService):
-    def __init__(self):
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
+        # 复用进程级共享客户端，避免每次请求都重新握手
+        self.client = client or get_http_client()
         self.api_key = os.getenv("DEEPL_API_KEY")
         self.api_type = os.getenv("DEEPL_API_TYPE", "free")
         self.base_url = "https://api.deepl.com" if self.api_type.lower() == "pro" else "https://api-free.deepl.com"
@@ -81,8 +121,8 @@ class DeepLTranslator(TranslatorService):
             raise ValueError(f"Unsupported language code: {lang_code}")
         return self.lang_code_map[lang_code]
 
-    async def translate_document(self, file_content: bytes, filename: str, source_lang: str, target_lang: str, glossary_id: Optional[str] = None) -> dict:
-        """翻译文档并返回结果"""
+    async def translate_document(self, file_content: Union[bytes, BinaryIO], filename: str, source_lang: str, target_lang: str, glossary_id: Optional[str] = None) -> dict:
+        """翻译文档并返回结果（file_content 可以是字节或文件句柄）"""
         if not self.api_key:
             raise ValueError("DeepL API key not configured")
 
@@ -112,20 +152,19 @@ class DeepLTranslator(TranslatorService):
             if glossary_id:
                 data['glossary_id'] = glossary_id
 
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.api_url}/document",
-                    files=files,
-                    data=data,  # 使用 data 而不是 json
-                    timeout=30.0
-                )
+            response = await self.client.post(
+                f"{self.api_url}/document",
+                files=files,
+                data=data,  # 使用 data 而不是 json
+                timeout=30.0
+            )
 
-                if response.status_code != 200:
-                    error_msg = response.text
-                    logger.error(f"DeepL API error: {error_msg}")
-                    raise ValueError(f"DeepL API error: {error_msg}")
+            if response.status_code != 200:
+                error_msg = response.text
+                logger.error(f"DeepL API error: {error_msg}")
+                raise ValueError(f"DeepL API error: {error_msg}")
 
-                return response.json()
+            return response.json()
 
         except Exception as e:
             logger.error(f"Document translation error: {str(e)}")
@@ -150,66 +189,111 @@ class DeepLTranslator(TranslatorService):
                 "Content-Type": "application/json"
             }
 
-            async with httpx.AsyncClient() as client:
-                # 使用 v2 endpoint
-                response = await client.post(
-                    f"{self.api_url}/translate",
-                    json=data,
-                    headers=headers
-                )
+            # 使用 v2 endpoint
+            response = await self.client.post(
+                f"{self.api_url}/translate",
+                json=data,
+                headers=headers
+            )
 
-                if response.status_code != 200:
-                    error_msg = response.text
-                    logger.error(f"DeepL API error: {error_msg}")
-                    raise ValueError(f"DeepL API error: {error_msg}")
+            if response.status_code != 200:
+                error_msg = response.text
+                logger.error(f"DeepL API error: {error_msg}")
+                raise ValueError(f"DeepL API error: {error_msg}")
 
-                return response.json()
+            return response.json()
 
         except Exception as e:
             logger.error(f"Text translation error: {str(e)}")
             raise
 
+    async def translate_texts(self, texts: List[str], target_lang: str, source_lang: Optional[str] = None) -> List[dict]:
+        """一次请求翻译多条文本（最多 50 条），返回与输入顺序一致的结果"""
+        if not self.api_key:
+            raise ValueError("DeepL API key not configured")
+
+        data = {
+            "text": texts,
+            "target_lang": target_lang
+        }
+        if source_lang:
+            data["source_lang"] = source_lang
+
+        response = await self.client.post(
+            f"{self.api_url}/translate",
+            headers={
+                "Authorization": f"DeepL-Auth-Key {self.api_key}"
+            },
+            json=data
+        )
+
+        if response.status_code != 200:
+            try:
+                error_message = response.json().get("message", "")
+            except ValueError:
+                error_message = ""
+
+            # 检查是否是字符限制错误
+            if "Character limit reached" in error_message:
+                logger.error("Translation character limit reached")
+                raise CharacterLimitError("Monthly character limit reached. Please contact administrator.")
+
+            raise DeepLRequestError(response.status_code, f"Translation failed: {response.text}")
+
+        return response.json()["translations"]
+
+    async def get_usage(self) -> dict:
+        """查询当前计费周期的字符用量 (GET /v2/usage)"""
+        response = await self.client.get(
+            f"{self.api_url}/usage",
+            headers={'Authorization': f"DeepL-Auth-Key {self.api_key}"}
+        )
+        if response.status_code != 200:
+            raise ValueError(f"Usage check failed: {response.text}")
+        return response.json()
+
     async def check_document_status(self, document_id: str, document_key: str) -> dict:
         """检查文档翻译状态"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.api_url}/document/{document_id}",
-                    data={'document_key': document_key},  # 使用 data 而不是 json
-                    headers={'Authorization': f"DeepL-Auth-Key {self.api_key}"}
-                )
+            response = await self.client.post(
+                f"{self.api_url}/document/{document_id}",
+                data={'document_key': document_key},  # 使用 data 而不是 json
+                headers={'Authorization': f"DeepL-Auth-Key {self.api_key}"}
+            )
+            
+            if response.status_code != 200:
+                raise ValueError(f"Status check failed: {response.text}")
                 
-                if response.status_code != 200:
-                    raise ValueError(f"Status check failed: {response.text}")
-                    
-                return response.json()
+            return response.json()
         except Exception as e:
             logger.error(f"Error checking document status: {str(e)}")
             raise
 
-    async def get_document_result(self, document_id: str, document_key: str) -> bytes:
-        """获取翻译结果"""
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.api_url}/document/{document_id}/result",
-                    data={'document_key': document_key},  # 使用 data 而不是 json
-                    headers={'Authorization': f"DeepL-Auth-Key {self.api_key}"}
-                )
-                
-                if response.status_code != 200:
-                    raise ValueError(f"Download failed: {response.text}")
-                    
-                return response.content
-        except Exception as e:
-            logger.error(f"Error downloading document: {str(e)}")
-            raise
+    async def open_document_result(self, document_id: str, document_key: str) -> httpx.Response:
+        """以流式方式打开翻译结果，调用方负责关闭响应"""
+        request = self.client.build_request(
+            "POST",
+            f"{self.api_url}/document/{document_id}/result",
+            data={'document_key': document_key},
+            headers={'Authorization': f"DeepL-Auth-Key {self.api_key}"}
+        )
+        response = await self.client.send(request, stream=True)
+        if response.status_code != 200:
+            await response.aread()
+            await response.aclose()
+            logger.error(f"Error downloading document: {response.text}")
+            raise ValueError(f"Download failed: {response.text}")
+        return response
 
 # Google翻译服务实现
 class GoogleTranslator(TranslatorService):
     def __init__(self):
         self.api_key = os.getenv("GOOGLE_TRANSLATE_API_KEY")
         self.project_id = os.getenv("GOOGLE_PROJECT_ID")
+        self.translate_v3 = None
+        # 未配置凭证时不导入 google.cloud，避免每次检查可用性都承担导入开销
+        if not (self.api_key and self.project_id):
+            return
         try:
             from google.cloud import translate_v3
             from google.oauth2 import service_account
@@ -261,14 +345,7 @@ class GoogleTranslator(TranslatorService):
             raise Exception(f"Google Translate API error: {str(e)}")
     
     def _get_mime_type(self, filename: str) -> str:
-        ext = filename.lower().split('.')[-1]
-        mime_types = {
-            'pdf': 'application/pdf',
-            'docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-            'pptx': 'application/vnd.openxmlformats-officedocument.presentationml.presentation',
-            'txt': 'text/plain'
-        }
-        return mime_types.get(ext, 'application/octet-stream')
+        return get_mime_type(filename)
 
 # 翻译服务工厂
 class TranslatorFactory:
@@ -288,7 +365,64 @@ class TranslatorFactory:
             
         return translator
 
-app = FastAPI(title="CargoPPT Translation API")
+# 文档翻译后台任务队列
+job_queue = JobQueue.from_env()
+
+# 文档解析进程池
+extraction_pool = ExtractionPool.from_env()
+
+# 文档文本提取缓存
+extraction_cache = ExtractionCache.from_env()
+
+# 页眉页脚等样板文本过滤（只影响发送给 Gemini 的文本）
+boilerplate_filter = BoilerplateFilter.from_env()
+
+# 近似重复文本块过滤（模板化的幻灯片、重复表格等只发送一次给 Gemini）
+near_duplicate_filter = NearDuplicateFilter.from_env()
+
+# DeepL 额度与速率控制
+quota_governor = DeepLQuotaGovernor.from_env(lambda: DeepLTranslator().get_usage())
+
+async def _translate_texts_governed(texts: List[str], target_lang: str, source_lang: Optional[str]) -> List[dict]:
+    """经过额度和速率控制后调用 DeepL 文本翻译"""
+    await quota_governor.acquire(sum(len(t) for t in texts))
+    try:
+        return await DeepLTranslator().translate_texts(texts, target_lang, source_lang)
+    except CharacterLimitError:
+        quota_governor.mark_exhausted()
+        raise
+
+# 文本翻译微批处理器：合并同一语言对的并发请求
+text_batcher = TextBatcher.from_env(_translate_texts_governed)
+
+# 文本翻译记忆缓存
+translation_cache = TranslationCache.from_env(SessionLocal)
+
+# 文档状态轮询中心：每个文档只轮询一次 DeepL
+status_hub = DocumentStatusHub.from_env(
+    lambda document_id, document_key: DeepLTranslator().check_document_status(document_id, document_key)
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """应用生命周期：创建共享的 HTTP 连接池并启动后台任务队列"""
+    await init_http_client()
+    if DeepLTranslator().is_available():
+        await quota_governor.start()
+    await extraction_pool.start()
+    await job_queue.start()
+    try:
+        yield
+    finally:
+        await status_hub.close()
+        await job_queue.stop()
+        extraction_pool.shutdown()
+        # 在关闭 HTTP 客户端之前发送完已收集的文本翻译批次
+        await text_batcher.close()
+        await quota_governor.stop()
+        await close_http_client()
+
+app = FastAPI(title="CargoPPT Translation API", lifespan=lifespan)
 
 # 添加 CORS 中间件配置
 app.add_middleware(
@@ -325,13 +459,374 @@ MAX_FILE_SIZE = 30 * 1024 * 1024  # 30MB in bytes
 # 设置超时时间
 TIMEOUT = 300.0  # 300秒
 
-@app.post("/api/translate")
+# 使用术语表时边解析文档边提取术语
+STREAMING_EXTRACTION = os.getenv("STREAMING_EXTRACTION", "true").lower() == "true"
+
+# 任务事件流的保活间隔（秒）
+JOB_EVENTS_HEARTBEAT = float(os.getenv("JOB_EVENTS_HEARTBEAT", 15))
+
+async def _sync_main_glossary(
+    source_lang: str,
+    target_lang: str,
+    new_terms: list,
+    progress: Optional[Callable[[int, int], None]] = None
+) -> Optional[str]:
+    """将新术语合并进主术语表，返回可用的术语表 ID；progress 按步骤（获取术语表、更新术语表）报告进度"""
+    # 仅在本阶段持有数据库会话
+    db = SessionLocal()
+    existing_glossary = None
+    try:
+        glossary_manager = GlossaryManager(db)
+        if new_terms:
+            try:
+                # 获取或创建主术语表
+                existing_glossary = await glossary_manager.get_or_create_main_glossary(
+                    source_lang, 
+                    target_lang
+                )
+                if progress is not None:
+                    progress(1, 2)
+                
+                # 更新术语表
+                result = await glossary_manager.update_main_glossary(
+                    source_lang,
+                    target_lang,
+                    new_terms
+                )
+                if progress is not None:
+                    progress(2, 2)
+                logger.info(f"Updated glossary with ID: {result['glossary_id']}")
+                return result["glossary_id"]
+            
+            except Exception as e:
+                logger.error(f"Error updating glossary: {str(e)}")
+                logger.error(traceback.format_exc())
+                # 如果更新失败，尝试使用现有术语表
+                if existing_glossary:
+                    logger.info(f"Falling back to existing glossary: {existing_glossary.get('glossary_id')}")
+                    return existing_glossary.get("glossary_id")
+                return None
+
+        # 如果没有新术语，使用现有术语表
+        main_glossary = await glossary_manager.get_or_create_main_glossary(
+            source_lang,
+            target_lang
+        )
+        logger.info(f"Using existing glossary: {main_glossary['glossary_id']}")
+        return main_glossary["glossary_id"]
+    finally:
+        db.close()
+
+def _glossary_version(source_lang: str, target_lang: str, use_glossary: bool) -> str:
+    """当前主术语表的版本（DeepL 术语表 ID，每次更新都会变化）
+
+    不使用术语表时为 "disabled"；使用术语表但该语言对尚无术语表时为 "pending"。
+    """
+    if not use_glossary:
+        return "disabled"
+    db = SessionLocal()
+    try:
+        glossary = db.query(Glossary).filter(
+            Glossary.source_lang == source_lang.upper(),
+            Glossary.target_lang == target_lang.upper()
+        ).first()
+        return glossary.deepl_glossary_id if glossary and glossary.deepl_glossary_id else "pending"
+    finally:
+        db.close()
+
+def _document_dedup_key(
+    content_hash: str,
+    source_lang: str,
+    target_lang: str,
+    use_glossary: bool,
+    glossary_version: str
+) -> str:
+    """文档翻译任务的去重键：文件内容 + 语言对 + 是否使用术语表 + 术语表版本"""
+    key = f"{content_hash}:{source_lang.upper()}:{target_lang.upper()}:{int(use_glossary)}:{glossary_version}"
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+def _check_quota(estimated_chars: int):
+    """额度不足时让任务失败"""
+    try:
+        quota_governor.check(estimated_chars)
+    except QuotaExceededError as e:
+        raise JobError("CHARACTER_LIMIT_REACHED", str(e))
+
+def _extraction_job_error(e: Exception) -> Exception:
+    """把解析排队、超时异常转换为任务错误，其他异常原样返回"""
+    if isinstance(e, ExtractionTimeoutError):
+        return JobError("EXTRACTION_TIMEOUT", str(e))
+    if isinstance(e, ExtractionQueueFullError):
+        return JobError("EXTRACTION_BUSY", str(e))
+    return e
+
+def _extraction_metadata(upload: SpooledUpload, segment_count: int, text_length: int) -> dict:
+    return {
+        "file_type": os.path.splitext(upload.filename.lower())[1][1:],
+        "file_size": upload.size,
+        "segments": segment_count,
+        "text_length": text_length
+    }
+
+async def _extract_document(upload: SpooledUpload) -> SegmentTable:
+    """按页、幻灯片或段落提取上传文档的文本段，相同内容命中缓存时跳过解析"""
+    cached = await extraction_cache.get(upload.sha256, upload.filename)
+    if cached is not None:
+        logger.info(f"Extraction cache hit for {upload.filename}")
+        return cached["segments"]
+    segments = await extraction_pool.extract(upload.path)
+    await extraction_cache.put(upload.sha256, upload.filename, segments, _extraction_metadata(upload, len(segments), segments.text_length))
+    return segments
+
+async def _stream_extract_terms(
+    upload: SpooledUpload,
+    source_lang: str,
+    target_lang: str,
+    chunk_stats: Optional[dict] = None,
+    progress: Optional[Callable[[int, Optional[int]], None]] = None
+) -> Tuple[int, Optional[list]]:
+    """流式解析文档并提取术语，返回 (文本长度, 术语列表)；chunk_stats 不为 None 时写入分块统计
+
+    文档在解析进程池中按页分批解析；解析失败或超时时任务失败，与非流式路径一致。
+    各批同时增量写入提取缓存，不在内存中保留整个文档。
+    """
+    segment_count = 0
+    text_length = 0
+    complete = False
+    failure: Optional[Exception] = None
+    cache_writer = extraction_cache.writer(upload.sha256, upload.filename)
+
+    async def counted_segments():
+        nonlocal segment_count, text_length, complete, failure
+        try:
+            async with aclosing(extraction_pool.iter_segments(upload.path)) as batches:
+                async for batch in batches:
+                    if cache_writer is not None:
+                        await cache_writer.add(batch)
+                    for *_, segment in batch:
+                        # 段之间的分隔符计入长度，与拼接后的全文一致
+                        text_length += len(segment) + (len(SEPARATOR) if segment_count else 0)
+                        segment_count += 1
+                        yield segment
+        except Exception as e:
+            # 术语提取会吞掉异常，在这里记下解析错误
+            failure = e
+            raise
+        complete = True
+
+    try:
+        try:
+            term_extractor = GeminiTermExtractor(near_duplicate_filter)
+            source = counted_segments()
+            if boilerplate_filter.applies_to(upload.filename):
+                source = boilerplate_filter.filter_stream(source)
+            new_terms = await term_extractor.extract_terms_from_stream(source, source_lang, target_lang, chunk_stats, progress)
+            logger.info(f"Extracted {len(new_terms)} new terms")
+        except Exception as e:
+            logger.error(f"Error in term extraction: {str(e)}")
+            logger.error(traceback.format_exc())
+            new_terms = None
+        if failure is not None:
+            raise _extraction_job_error(failure)
+
+        # 完整解析过的文档才发布缓存条目
+        if complete and cache_writer is not None:
+            await cache_writer.commit(_extraction_metadata(upload, segment_count, text_length))
+    finally:
+        if cache_writer is not None:
+            await cache_writer.abort()
+    return text_length, new_terms
+
+def _job_progress(job: Job, unit: str) -> Callable[[int, Optional[int]], None]:
+    """生成把 (已处理量, 总量) 写入任务进度的回调"""
+    def report(processed: int, total: Optional[int]) -> None:
+        job.report_progress(processed, total, unit)
+    return report
+
+async def _run_translation_job(
+    job: Job,
+    upload: SpooledUpload,
+    source_lang: str,
+    target_lang: str,
+    use_glossary: bool,
+    leader: Optional[Job] = None
+) -> dict:
+    """后台执行文档翻译任务，结束后删除落盘的上传文件"""
+    try:
+        return await _translation_pipeline(job, upload, source_lang, target_lang, use_glossary, leader)
+    finally:
+        upload.cleanup()
+
+async def _translation_pipeline(
+    job: Job,
+    upload: SpooledUpload,
+    source_lang: str,
+    target_lang: str,
+    use_glossary: bool,
+    leader: Optional[Job] = None
+) -> dict:
+    """文档翻译流水线：提取文本 -> 提取术语 -> 同步术语表 -> 上传 DeepL
+
+    leader 为相同文档的先前任务：复用它的提取、术语和术语表结果，只单独上传 DeepL。
+    DeepL 的译文下载一次后即被删除，因此每次提交都需要自己的 document_id。
+    """
+    shared = leader.shared if leader is not None else None
+    if shared is not None:
+        logger.info(f"Reusing extraction and glossary of job {leader.job_id}")
+    else:
+        shared = await _prepare_translation(job, upload, source_lang, target_lang, use_glossary)
+        job.share(shared)
+        # 本任务更新术语表后版本会变化，用新版本再登记一次，使相同文件的重复提交能命中
+        if use_glossary:
+            job_queue.register_dedup_key(
+                job,
+                _document_dedup_key(
+                    upload.sha256,
+                    source_lang,
+                    target_lang,
+                    use_glossary,
+                    shared["glossary_id"] or "pending"
+                )
+            )
+
+    # 术语表是否使用由本次提交决定，不继承 leader 的设置
+    glossary_id = shared["glossary_id"] if use_glossary else None
+    result = await _upload_document(
+        job,
+        upload,
+        source_lang,
+        target_lang,
+        glossary_id,
+        quota_governor.estimate_document_chars(shared["text_length"])
+    )
+
+    return {
+        "document_id": result["document_id"],
+        "document_key": result["document_key"],
+        "filename": upload.filename,
+        "glossary_id": glossary_id,
+        "has_glossary": bool(glossary_id),
+        "term_chunks": shared["term_chunks"]
+    }
+
+async def _prepare_translation(
+    job: Job,
+    upload: SpooledUpload,
+    source_lang: str,
+    target_lang: str,
+    use_glossary: bool
+) -> dict:
+    """上传前的准备：提取文本、提取术语、同步术语表，返回可被重复提交复用的结果"""
+    filename = upload.filename
+    new_terms = None
+    # 术语提取的分块统计（块数、跳过的近似重复块、估算 token 数），随任务结果返回
+    chunk_stats: dict = {}
+
+    # 相同内容已解析过时直接使用缓存文本，不再解析也不走流式路径
+    cached = await extraction_cache.get(upload.sha256, filename)
+    if cached is not None:
+        logger.info(f"Extraction cache hit for {filename}")
+
+    if cached is None and use_glossary and STREAMING_EXTRACTION:
+        # 1+2. 边解析边提取术语，首个 Gemini 调用无需等待整个文档解析完成
+        _check_quota(quota_governor.document_min_chars)
+        async with job_queue.stage(job, JobStatus.EXTRACTING_TERMS):
+            text_length, new_terms = await _stream_extract_terms(
+                upload, source_lang, target_lang, chunk_stats, _job_progress(job, "chunks")
+            )
+        logger.info(f"Streamed text content length: {text_length}")
+    else:
+        if cached is not None:
+            segments = cached["segments"]
+        else:
+            # 1. 提取文档文本（直接读取落盘文件，不再复制一份）
+            async with job_queue.stage(job, JobStatus.PROCESSING_DOCUMENT):
+                try:
+                    segments = await extraction_pool.extract(upload.path, _job_progress(job, "pages"))
+                except (ExtractionTimeoutError, ExtractionQueueFullError) as e:
+                    raise _extraction_job_error(e)
+            await extraction_cache.put(upload.sha256, filename, segments, _extraction_metadata(upload, len(segments), segments.text_length))
+        text_length = segments.text_length
+        logger.info(f"Extracted text content length: {text_length}")
+
+        # 额度不足时在调用 Gemini 和上传之前就失败
+        _check_quota(quota_governor.estimate_document_chars(text_length))
+
+        if use_glossary and text_length:
+            # 2. 提取新术语
+            async with job_queue.stage(job, JobStatus.EXTRACTING_TERMS):
+                try:
+                    logger.info("Starting term extraction...")
+                    term_extractor = GeminiTermExtractor(near_duplicate_filter)
+                    # 按提取时的页/幻灯片分段去除页眉页脚
+                    term_text, _ = boilerplate_filter.strip_table(segments, filename)
+                    new_terms = await term_extractor.extract_terms(
+                        term_text, source_lang, target_lang, chunk_stats, _job_progress(job, "chunks")
+                    )
+                    logger.info(f"Extracted {len(new_terms)} new terms")
+                except Exception as e:
+                    logger.error(f"Error in term extraction: {str(e)}")
+                    logger.error(traceback.format_exc())
+
+    glossary_id = None
+    if new_terms is not None and text_length:
+        try:
+            # 3. 更新主术语表
+            async with job_queue.stage(job, JobStatus.CREATING_GLOSSARY):
+                glossary_id = await _sync_main_glossary(source_lang, target_lang, new_terms, _job_progress(job, "steps"))
+
+        except Exception as e:
+            logger.error(f"Error in glossary management: {str(e)}")
+            logger.error(traceback.format_exc())
+            glossary_id = None
+
+    return {
+        "glossary_id": glossary_id,
+        "text_length": text_length,
+        "term_chunks": chunk_stats or None
+    }
+
+async def _upload_document(
+    job: Job,
+    upload: SpooledUpload,
+    source_lang: str,
+    target_lang: str,
+    glossary_id: Optional[str],
+    estimated_chars: int
+) -> dict:
+    """4. 上传 DeepL 执行翻译，返回 document_id / document_key"""
+    async with job_queue.stage(job, JobStatus.UPLOADING):
+        translator = DeepLTranslator()
+        try:
+            await quota_governor.acquire(estimated_chars)
+        except QuotaExceededError as e:
+            raise JobError("CHARACTER_LIMIT_REACHED", str(e))
+        except RateLimitedError as e:
+            raise JobError("RATE_LIMITED", str(e))
+        try:
+            # 以文件句柄上传，httpx 分块读取并流式发送 multipart 请求体
+            with upload.open(_job_progress(job, "bytes")) as file_obj:
+                result = await translator.translate_document(
+                    file_content=file_obj,
+                    filename=upload.filename,
+                    source_lang=source_lang,
+                    target_lang=target_lang,
+                    glossary_id=glossary_id
+                )
+        except Exception as e:
+            logger.error(f"Translation error: {str(e)}")
+            if "Character limit reached" in str(e) or "Quota" in str(e):
+                quota_governor.mark_exhausted()
+                raise JobError("CHARACTER_LIMIT_REACHED", str(e))
+            raise JobError("TRANSLATION_ERROR", str(e))
+    return result
+
+@app.post("/api/translate", status_code=202)
 async def translate_document(
     file: UploadFile = File(...),
     source_lang: str = Form(...),
     target_lang: str = Form(...),
-    use_glossary: bool = Form(True),
-    db: Session = Depends(get_db)
+    use_glossary: bool = Form(True)
 ):
     try:
         # 1. 基础验证
@@ -351,94 +846,61 @@ async def translate_document(
                 detail={"code": "INVALID_FILE_TYPE", "message": "Only PDF, DOCX, and PPTX files are supported"}
             )
 
-        content = await file.read()
-        if len(content) > MAX_FILE_SIZE:
+        # 上传内容只落盘一次，同时计算哈希
+        try:
+            upload = await spool_upload(file, MAX_FILE_SIZE)
+        except FileTooLargeError:
             raise HTTPException(
                 status_code=413,
                 detail={"code": "FILE_TOO_LARGE", "message": "File size exceeds limit"}
             )
 
-        # 2. 提取文档文本
-        doc_processor = DocumentProcessor()
-        text_content = await doc_processor.process_file_async(content, file.filename)
-        logger.info(f"Extracted text content length: {len(text_content)}")
-
-        glossary_id = None
-        if use_glossary and text_content:
-            try:
-                term_extractor = GeminiTermExtractor()
-                glossary_manager = GlossaryManager(db)
-
-                # 3. 提取新术语
-                logger.info("Starting term extraction...")
-                new_terms = await term_extractor.extract_terms(text_content, source_lang, target_lang)
-                logger.info(f"Extracted {len(new_terms)} new terms")
-
-                if new_terms:
-                    try:
-                        # 4. 获取或创建主术语表
-                        existing_glossary = await glossary_manager.get_or_create_main_glossary(
-                            source_lang, 
-                            target_lang
-                        )
-                        
-                        # 5. 更新术语表
-                        result = await glossary_manager.update_main_glossary(
-                            source_lang,
-                            target_lang,
-                            new_terms
-                        )
-                        glossary_id = result["glossary_id"]
-                        logger.info(f"Updated glossary with ID: {glossary_id}")
-                    
-                    except Exception as e:
-                        logger.error(f"Error updating glossary: {str(e)}")
-                        logger.error(traceback.format_exc())
-                        # 如果更新失败，尝试使用现有术语表
-                        if existing_glossary:
-                            glossary_id = existing_glossary.get("glossary_id")
-                            logger.info(f"Falling back to existing glossary: {glossary_id}")
-                else:
-                    # 如果没有新术语，使用现有术语表
-                    main_glossary = await glossary_manager.get_or_create_main_glossary(
-                        source_lang,
-                        target_lang
-                    )
-                    glossary_id = main_glossary["glossary_id"]
-                    logger.info(f"Using existing glossary: {glossary_id}")
-
-            except Exception as e:
-                logger.error(f"Error in glossary management: {str(e)}")
-                logger.error(traceback.format_exc())
-                glossary_id = None
-
-        # 6. 执行翻译
-        translator = DeepLTranslator()
         try:
-            result = await translator.translate_document(
-                file_content=content,
-                filename=file.filename,
-                source_lang=source_lang,
-                target_lang=target_lang,
-                glossary_id=glossary_id
+            # 2. 相同文件、语言对、术语表设置和版本的任务复用其提取、术语和术语表结果，
+            #    DeepL 仍单独上传（译文下载一次后即被 DeepL 删除，不能共享 document_id）
+            dedup_key = _document_dedup_key(
+                upload.sha256,
+                source_lang,
+                target_lang,
+                use_glossary,
+                _glossary_version(source_lang, target_lang, use_glossary)
             )
-
-            return {
-                "document_id": result["document_id"],
-                "document_key": result["document_key"],
-                "glossary_id": glossary_id,
-                "has_glossary": bool(glossary_id)
-            }
-
-        except Exception as e:
-            logger.error(f"Translation error: {str(e)}")
-            raise HTTPException(
-                status_code=500,
-                detail={"code": "TRANSLATION_ERROR", "message": str(e)}
+            existing_job = job_queue.find_duplicate(dedup_key)
+            if existing_job:
+                logger.info(f"Sharing work of job {existing_job.job_id} with duplicate document submission")
+                job = job_queue.submit(
+                    _run_translation_job,
+                    upload,
+                    source_lang,
+                    target_lang,
+                    use_glossary,
+                    existing_job,
+                    after=existing_job,
+                    cleanup=upload.cleanup
+                )
+                return {**job.to_dict(), "deduplicated": True}
+
+            # 3. 提交后台任务，立即返回任务 ID，落盘文件由任务负责清理
+            job = job_queue.submit(
+                _run_translation_job,
+                upload,
+                source_lang,
+                target_lang,
+                use_glossary,
+                dedup_key=dedup_key
             )
+            return job.to_dict()
+        except BaseException:
+            upload.cleanup()
+            raise
 
     except HTTPException:
         raise
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=503,
+            detail={"code": "QUEUE_FULL", "message": str(e)}
+        )
     except Exception as e:
         logger.error(f"Unexpected error: {str(e)}")
         logger.error(traceback.format_exc())
@@ -447,11 +909,50 @@ async def translate_document(
             detail={"code": "UNEXPECTED_ERROR", "message": "An unexpected error occurred"}
         )
 
+# 查询翻译任务状态
+@app.get("/api/jobs/{job_id}")
+async def get_job_status(job_id: str):
+    job = job_queue.get(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=404,
+            detail={"code": "JOB_NOT_FOUND", "message": f"Job {job_id} not found"}
+        )
+    return job.to_dict()
+
+# 通过 SSE 推送任务状态、当前阶段进度和预计剩余时间，替代客户端轮询 /api/jobs/{job_id}
+@app.get("/api/jobs/{job_id}/events")
+async def stream_job_events(job_id: str):
+    job = job_queue.get(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=404,
+            detail={"code": "JOB_NOT_FOUND", "message": f"Job {job_id} not found"}
+        )
+
+    async def event_generator():
+        async for data in job_queue.events(job, heartbeat=JOB_EVENTS_HEARTBEAT):
+            # None 表示一段时间内没有变化，发送注释行保持连接
+            yield format_sse(data) if data is not None else ": keepalive\n\n"
+
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # 关闭 nginx 缓冲
+        }
+    )
+
 
 # 修改状态检查端点以包含术语表信息
 @app.post("/api/translate/{document_id}/status")
 async def check_translation_status(document_id: str, document_key: str = Form(...)):
     try:
+        # 如果已有推送连接在轮询该文档，直接复用最近的状态
+        status = status_hub.latest(document_id, document_key, max_age=status_hub.min_interval * 2)
+        if status:
+            return status
         translator = DeepLTranslator()
         status = await translator.check_document_status(document_id, document_key)
         return status
@@ -462,24 +963,61 @@ async def check_translation_status(document_id: str, document_key: str = Form(..
             detail={"code": "STATUS_CHECK_ERROR", "message": str(e)}
         )
 
-# 在文件开头添加自定义异常类
-class CharacterLimitError(Exception):
-    """DeepL API character limit reached exception"""
-    pass
+# 通过 SSE 推送文档翻译状态，多个连接共享同一个上游轮询
+@app.get("/api/translate/{document_id}/events")
+async def stream_translation_status(document_id: str, document_key: str = Query(...)):
+    if not status_hub.can_subscribe(document_id, document_key):
+        raise HTTPException(
+            status_code=403,
+            detail={"code": "INVALID_DOCUMENT_KEY", "message": "Document key does not match"}
+        )
+
+    async def event_generator():
+        async for status in status_hub.stream(document_id, document_key):
+            # None 表示一段时间内没有新状态，发送注释行保持连接
+            yield format_sse(status) if status is not None else ": keepalive\n\n"
+
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # 关闭 nginx 缓冲
+        }
+    )
 
 # 修改文档翻译下载端点
 @app.post("/api/translate/{document_id}/result")
-async def download_document(document_id: str, document_key: str = Form(...)):
+async def download_document(
+    document_id: str,
+    document_key: str = Form(...),
+    filename: Optional[str] = Form(None)
+):
     try:
+        # 根据原始上传文件确定文件名和类型
+        job = job_queue.find_by_document(document_id)
+        if job and job.result.get("filename"):
+            filename = job.result["filename"]
+        filename = filename or "translated_document"
+
         translator = DeepLTranslator()
-        result = await translator.get_document_result(document_id, document_key)
-        
-        return Response(
-            content=result,
-            media_type="application/octet-stream",
-            headers={
-                "Content-Disposition": f"attachment; filename=translated_document"
-            }
+        upstream = await translator.open_document_result(document_id, document_key)
+
+        headers = {
+            "Content-Disposition": (
+                f"attachment; filename=\"{quote(filename)}\"; filename*=UTF-8''{quote(filename)}"
+            )
+        }
+        # 上游未压缩时才透传长度，否则解压后长度会变化
+        if "content-length" in upstream.headers and "content-encoding" not in upstream.headers:
+            headers["Content-Length"] = upstream.headers["content-length"]
+
+        # 分块转发 DeepL 的响应体，避免整个文件驻留内存
+        return StreamingResponse(
+            upstream.aiter_bytes(),
+            media_type=get_mime_type(filename),
+            headers=headers,
+            background=BackgroundTask(upstream.aclose)
         )
     except Exception as e:
         logger.error(f"Download error: {str(e)}")
@@ -491,45 +1029,47 @@ async def download_document(document_id: str, document_key: str = Form(...)):
 # 同样修改文本翻译端点
 @app.post("/api/translate/text")
 async def translate_text(
-    text: str = Form(...),
+    text: List[str] = Form(...),
     target_lang: str = Form(...),
+    source_lang: Optional[str] = Form(None)
 ):
     try:
         translator = DeepLTranslator()
         if not translator.api_key:
             raise HTTPException(status_code=500, detail="DeepL API key not configured")
 
-        base_url = translator.api_url.replace("/document", "")
-        
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{base_url}/translate",
-                headers={
-                    "Authorization": f"DeepL-Auth-Key {translator.api_key}"
-                },
-                json={
-                    "text": [text],
-                    "target_lang": target_lang
-                }
-            )
-            
-            if response.status_code != 200:
-                error_data = response.json()
-                error_message = error_data.get("message", "")
-                
-                # 检查是否是字符限制错误
-                if "Character limit reached" in error_message:
-                    logger.error("Translation character limit reached")
-                    raise CharacterLimitError("Monthly character limit reached. Please contact administrator.")
-                
-                raise HTTPException(
-                    status_code=response.status_code,
-                    detail=f"Translation failed: {response.text}"
-                )
-            
-            return response.json()
+        # 先查翻译记忆，命中的文本不再消耗 DeepL 字符额度
+        keys = [make_cache_key(t, source_lang, target_lang) for t in text]
+        cached = await translation_cache.get_many(keys)
+
+        # 未命中的文本去重后再发送
+        pending: Dict[str, str] = {}
+        for key, t in zip(keys, text):
+            if key not in cached and key not in pending:
+                pending[key] = t
+
+        if pending:
+            pending_texts = list(pending.values())
+            # 额度不足时直接拒绝，不再请求 DeepL
+            quota_governor.check(sum(len(t) for t in pending_texts))
+            if len(pending_texts) == 1:
+                # 单条请求交给微批处理器，与并发请求合并发送
+                new_translations = [await text_batcher.translate(pending_texts[0], target_lang, source_lang)]
+            else:
+                new_translations = await text_batcher.translate_many(pending_texts, target_lang, source_lang)
+
+            fresh = dict(zip(pending.keys(), new_translations))
+            cached.update(fresh)
+            await translation_cache.put_many([
+                (key, translation, source_lang, target_lang, None)
+                for key, translation in fresh.items()
+            ])
 
-    except CharacterLimitError as e:
+        return {"translations": [cached[key] for key in keys]}
+
+    except HTTPException:
+        raise
+    except (CharacterLimitError, QuotaExceededError) as e:
         # 返回特定的错误代码和消息
         raise HTTPException(
             status_code=429,  # Too Many Requests
@@ -538,6 +1078,13 @@ async def translate_text(
                 "message": str(e)
             }
         )
+    except RateLimitedError as e:
+        raise HTTPException(
+            status_code=429,
+            detail={"code": "RATE_LIMITED", "message": str(e)}
+        )
+    except DeepLRequestError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
     except Exception as e:
         logger.error(f"Text translation error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -546,6 +1093,29 @@ async def translate_text(
 def health_check():
     return {"status": "ok"}
 
+# 运行指标：缓存命中率、上游请求量等
+@app.get("/api/metrics")
+def get_metrics():
+    return {
+        "translation_cache": translation_cache.stats(),
+        "deepl_quota": quota_governor.stats(),
+        "text_batcher": {
+            "upstream_requests": text_batcher.upstream_requests,
+            "batched_texts": text_batcher.batched_texts
+        },
+        "document_status": {
+            "upstream_requests": status_hub.upstream_requests
+        },
+        "jobs": {
+            "tracked": len(job_queue.jobs),
+            "stages": job_queue.stage_stats()
+        },
+        "extraction_pool": extraction_pool.stats(),
+        "extraction_cache": extraction_cache.stats(),
+        "boilerplate": boilerplate_filter.stats(),
+        "near_duplicates": near_duplicate_filter.stats()
+    }
+
 @app.get("/api/health/db")
 async def check_db_health(db: Session = Depends(get_db)):
     try:
@@ -567,24 +1137,43 @@ async def create_glossary(
     db: Session = Depends(get_db)
 ):
     try:
-        # 1. 读取文件内容
-        content = await file.read()
+        # 1. 上传内容落盘
+        try:
+            upload = await spool_upload(file, MAX_FILE_SIZE)
+        except FileTooLargeError:
+            raise HTTPException(
+                status_code=413,
+                detail={"code": "FILE_TOO_LARGE", "message": "File size exceeds limit"}
+            )
         
-        # 2. 使用 DocumentProcessor 提取文本
-        doc_processor = DocumentProcessor()
-        text_content = await doc_processor.process_file_async(content, file.filename)
+        # 2. 使用 DocumentProcessor 提取文本（相同内容命中缓存时跳过）
+        try:
+            segments = await _extract_document(upload)
+        except ExtractionQueueFullError as e:
+            raise HTTPException(
+                status_code=503,
+                detail={"code": "EXTRACTION_BUSY", "message": str(e)}
+            )
+        except ExtractionTimeoutError as e:
+            raise HTTPException(
+                status_code=504,
+                detail={"code": "EXTRACTION_TIMEOUT", "message": str(e)}
+            )
+        finally:
+            upload.cleanup()
         
-        if not text_content:
+        if not segments.text_length:
             raise HTTPException(
                 status_code=400,
                 detail={"code": "TEXT_EXTRACTION_ERROR", "message": "Failed to extract text from document"}
             )
         
         # 3. 生成术语表 payload
-        term_extractor = GeminiTermExtractor()
+        term_extractor = GeminiTermExtractor(near_duplicate_filter)
         glossary_manager = GlossaryManager(db)
+        term_text, _ = boilerplate_filter.strip_table(segments, file.filename)
         glossary_payload = await term_extractor.create_glossary_payload(
-            text_content, 
+            term_text, 
             primary_lang,
             name
         )
@@ -598,6 +1187,8 @@ async def create_glossary(
             "dictionaries": result["dictionaries"]
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Glossary creation error: {str(e)}")
         raise HTTPException(
@@ -0,0 +1,15 @@
+# backend/models/translation_memory.py  翻译记忆模型
+from sqlalchemy import Column, Integer, String, Text, DateTime, text
+from database import Base
+
+class TranslationMemory(Base):
+    __tablename__ = "translation_memory"
+
+    id = Column(Integer, primary_key=True)
+    cache_key = Column(String(64), unique=True, nullable=False)  # 规范化文本 + 语言对 + 术语表的 SHA-256
+    source_lang = Column(String(10))
+    target_lang = Column(String(10), nullable=False)
+    glossary_id = Column(String(255))
+    translated_text = Column(Text, nullable=False)
+    detected_source_language = Column(String(10))
+    created_at = Column(DateTime(timezone=True), server_default=text('CURRENT_TIMESTAMP'))
@@ -0,0 +1,212 @@
+# backend/services/boilerplate.py
+# 页眉页脚等样板文本检测：去除在多数页面/幻灯片中重复出现的行，减少发送给 Gemini 的 token
+import os
+import re
+import logging
+from collections import Counter
+from typing import AsyncIterable, AsyncIterator, Iterable, List, Optional, Set, Tuple
+from .segment_table import SEPARATOR, SegmentTable
+
+logger = logging.getLogger(__name__)
+
+_DIGITS = re.compile(r'\d+')
+
+
+class BoilerplateFilter:
+    """按行统计跨页重复次数，出现在足够多页面中的短行视为样板文本
+
+    只有页首、页尾 edge_lines 行内不超过 edge_line_length 的短行忽略数字差异（页码、日期），
+    且须出现在各页的同一位置（如每页最后一行）；其他行必须完全相同才算重复，
+    避免把只有数字不同的表格行、编号条款当作样板去除。
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        min_repeats: int = 3,
+        min_ratio: float = 0.5,
+        max_line_length: int = 200,
+        warmup: int = 8,
+        edge_lines: int = 2,
+        edge_line_length: int = 80,
+        extensions: Iterable[str] = ('.pdf', '.pptx')
+    ):
+        self.enabled = enabled
+        # 一行至少出现在 min_repeats 页，且不少于总页数的 min_ratio，才视为样板文本
+        self.min_repeats = min_repeats
+        self.min_ratio = min_ratio
+        self.max_line_length = max_line_length
+        # 流式处理时先缓存的页数，用于建立初始统计
+        self.warmup = max(1, warmup)
+        self.edge_lines = max(0, edge_lines)
+        self.edge_line_length = edge_line_length
+        self.extensions = set(extensions)
+        self.documents = 0
+        self.filtered_documents = 0
+        self.removed_chars = 0
+        self.removed_lines = 0
+
+    @classmethod
+    def from_env(cls) -> "BoilerplateFilter":
+        return cls(
+            enabled=os.getenv("BOILERPLATE_FILTER", "true").lower() == "true",
+            min_repeats=int(os.getenv("BOILERPLATE_MIN_REPEATS", 3)),
+            min_ratio=float(os.getenv("BOILERPLATE_MIN_RATIO", 0.5)),
+            max_line_length=int(os.getenv("BOILERPLATE_MAX_LINE_LENGTH", 200)),
+            warmup=int(os.getenv("BOILERPLATE_WARMUP_SEGMENTS", 8)),
+            edge_lines=int(os.getenv("BOILERPLATE_EDGE_LINES", 2)),
+            edge_line_length=int(os.getenv("BOILERPLATE_EDGE_LINE_LENGTH", 80))
+        )
+
+    def applies_to(self, filename: str) -> bool:
+        """只处理按页/幻灯片分段的格式"""
+        return self.enabled and os.path.splitext(filename.lower())[1] in self.extensions
+
+    def _keyed_lines(self, segment: str) -> List[Tuple[str, Optional[str]]]:
+        """返回每行及其规范化形式；空行和过长的行不参与统计，规范化形式为 None"""
+        lines = segment.split('\n')
+        content = [index for index, line in enumerate(lines) if line.strip()]
+        # 页首页尾的行号 -> 位置标记（第 n 行 / 倒数第 n 行），同一行同时位于两端时按页首计
+        edges = {}
+        if self.edge_lines:
+            for position, index in enumerate(reversed(content[-self.edge_lines:])):
+                edges[index] = f"${position}"
+            for position, index in enumerate(content[:self.edge_lines]):
+                edges[index] = f"^{position}"
+        keyed = []
+        for index, line in enumerate(lines):
+            key = None
+            if line.strip() and len(line) <= self.max_line_length:
+                key = ' '.join(line.split()).casefold()
+                if index in edges and len(key) <= self.edge_line_length:
+                    # 页首页尾的短行：页码、日期等数字不同但位置相同的行视为同一行
+                    key = f"{edges[index]}\x1f{_DIGITS.sub('#', key)}"
+            keyed.append((line, key))
+        return keyed
+
+    def _line_keys(self, segment: str) -> Set[str]:
+        return {key for _, key in self._keyed_lines(segment) if key is not None}
+
+    def _threshold(self, segment_count: int) -> float:
+        return max(self.min_repeats, self.min_ratio * segment_count)
+
+    def detect(self, segments: List[str]) -> Set[str]:
+        """返回样板行的规范化形式"""
+        if len(segments) < self.min_repeats:
+            return set()
+        counts: Counter = Counter()
+        for segment in segments:
+            counts.update(self._line_keys(segment))
+        threshold = self._threshold(len(segments))
+        return {key for key, count in counts.items() if count >= threshold}
+
+    def _strip_segment(self, segment: str, boilerplate: Set[str]) -> Tuple[str, int]:
+        """去除样板行，返回 (剩余文本, 去除的行数)"""
+        if not boilerplate:
+            return segment, 0
+        kept = []
+        removed = 0
+        for line, key in self._keyed_lines(segment):
+            if key is not None and key in boilerplate:
+                removed += 1
+            else:
+                kept.append(line)
+        return ('\n'.join(kept) if removed else segment), removed
+
+    def strip_segments(self, segments: List[str]) -> Tuple[List[str], int]:
+        """去除各段中的样板行，返回 (剩余的非空段, 去除的字符数)"""
+        boilerplate = self.detect(segments) if self.enabled else set()
+        result = []
+        removed_lines = 0
+        for segment in segments:
+            text, removed = self._strip_segment(segment, boilerplate)
+            removed_lines += removed
+            if text.strip():
+                result.append(text)
+        removed_chars = sum(map(len, segments)) - sum(map(len, result))
+        self._record(removed_chars, removed_lines)
+        return result, removed_chars
+
+    def strip_table(self, segments: SegmentTable, filename: str) -> Tuple[str, int]:
+        """按段表中的页/幻灯片检测并去除样板行，返回 (拼接后的文本, 去除的字符数)
+
+        页内可能有空行，不能从拼接后的全文按空行还原页面，必须使用提取时的分段。
+        """
+        if not self.applies_to(filename) or not len(segments):
+            return segments.text, 0
+        kept, removed_chars = self.strip_segments(segments.texts)
+        return SEPARATOR.join(kept), removed_chars
+
+    async def filter_stream(self, segments: AsyncIterable[str]) -> AsyncIterator[str]:
+        """流式去除样板行：先缓存 warmup 页建立统计，之后每页边统计边过滤"""
+        counts: Counter = Counter()
+        boilerplate: Set[str] = set()
+        buffered: Optional[List[str]] = []
+        seen = 0
+        input_chars = 0
+        output_chars = 0
+        removed_lines = 0
+
+        def emit(segment: str) -> Optional[str]:
+            nonlocal output_chars, removed_lines
+            text, removed = self._strip_segment(segment, boilerplate)
+            removed_lines += removed
+            if not text.strip():
+                return None
+            output_chars += len(text)
+            return text
+
+        async for segment in segments:
+            seen += 1
+            input_chars += len(segment)
+            keys = self._line_keys(segment)
+            counts.update(keys)
+            threshold = self._threshold(seen)
+
+            if buffered is not None:
+                buffered.append(segment)
+                if seen < self.warmup:
+                    continue
+                # 预热结束：用已缓存的页建立样板行集合，再输出缓存的页
+                if seen >= self.min_repeats:
+                    boilerplate.update(key for key, count in counts.items() if count >= threshold)
+                pending, buffered = buffered, None
+                for item in pending:
+                    text = emit(item)
+                    if text is not None:
+                        yield text
+                continue
+
+            boilerplate.update(key for key in keys if counts[key] >= threshold)
+            text = emit(segment)
+            if text is not None:
+                yield text
+
+        if buffered:
+            # 文档页数少于预热页数
+            if seen >= self.min_repeats:
+                threshold = self._threshold(seen)
+                boilerplate.update(key for key, count in counts.items() if count >= threshold)
+            for item in buffered:
+                text = emit(item)
+                if text is not None:
+                    yield text
+
+        self._record(input_chars - output_chars, removed_lines)
+
+    def _record(self, removed_chars: int, removed_lines: int):
+        self.documents += 1
+        if removed_chars > 0:
+            self.filtered_documents += 1
+            self.removed_chars += removed_chars
+            self.removed_lines += removed_lines
+            logger.info(f"Removed {removed_chars} boilerplate characters ({removed_lines} lines)")
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "documents": self.documents,
+            "filtered_documents": self.filtered_documents,
+            "removed_chars": self.removed_chars,
+            "removed_lines": self.removed_lines
+        }
@@ -1,14 +1,20 @@
 # backend/services/document_chunker.py 
 # 文档分块器
-from typing import List, Optional, Generator, Iterator, AsyncGenerator, Tuple
-import re
+from typing import Callable, List, Optional, Generator, Iterator, Iterable, AsyncGenerator, AsyncIterable, AsyncIterator, Tuple
+import os
+import codecs
 from math import ceil
 import io
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import time
 from .document_processor import DocumentProcessor
+from .sentence_segmenter import SentenceSegmenter, Span
+from .token_estimator import TokenEstimator
 import asyncio
 
+# 流式分块时用于判断句子结束的标点
+SENTENCE_END_MARKS = ('.', '。', '!', '！', '?', '？')
+
 @dataclass
 class ProcessingStats:
     total_size: int
@@ -16,85 +22,189 @@ class ProcessingStats:
     chunk_count: int
     estimated_time_remaining: Optional[float]
 
+@dataclass
+class ChunkPlan:
+    """分块结果及每块的估算 token 数，用于预估 Gemini 调用量"""
+    chunks: List[str]
+    tokens: List[int]
+    output_tokens_per_call: int = 0
+    calls: int = field(init=False)
+
+    def __post_init__(self):
+        self.calls = len(self.chunks)
+
+    @property
+    def input_tokens(self) -> int:
+        return sum(self.tokens)
+
+    @property
+    def total_tokens(self) -> int:
+        """输入 token 加上每次调用预留的输出 token"""
+        return self.input_tokens + self.output_tokens_per_call * self.calls
+
+class _ChunkPacker:
+    """按句子累积文本块，超过 max_chunk_size 时输出并保留 overlap 个句子
+
+    measure 为块大小的计量方式，默认按字符数；token 模式下传入 TokenEstimator。
+    """
+
+    def __init__(self, max_chunk_size: int, overlap: int, measure: Callable[[str], int] = len):
+        self.max_chunk_size = max_chunk_size
+        self.overlap = overlap
+        self.measure = measure
+        self.current_chunk: List[str] = []
+        self.current_size = 0
+
+    def _split_oversized(self, sentence: str) -> List[str]:
+        if self.measure is len:
+            step = self.max_chunk_size
+        else:
+            step = self.measure.max_chars(sentence, self.max_chunk_size)
+        return [sentence[j:j + step] for j in range(0, len(sentence), step)]
+
+    def add(self, sentence: str) -> List[str]:
+        """加入一个句子，返回因此完成的块"""
+        chunks = []
+        sentence_size = self.measure(sentence)
+
+        # 如果单个句子就超过了最大块大小，需要进一步分割
+        if sentence_size > self.max_chunk_size:
+            if self.current_chunk:
+                chunks.append(" ".join(self.current_chunk))
+                self.current_chunk = []
+                self.current_size = 0
+
+            # 按字符分割大句子
+            chunks.extend(self._split_oversized(sentence))
+            return chunks
+
+        # 检查添加这个句子是否会超过块大小限制
+        if self.current_size + sentence_size > self.max_chunk_size:
+            chunks.append(" ".join(self.current_chunk))
+            # 保留最后 overlap 个句子作为下一个块的开始
+            self.current_chunk = self.current_chunk[-self.overlap:] if self.overlap > 0 else []
+            self.current_size = sum(map(self.measure, self.current_chunk))
+
+        self.current_chunk.append(sentence)
+        self.current_size += sentence_size
+        return chunks
+
+    def finish(self) -> List[str]:
+        """输出最后一个块"""
+        if not self.current_chunk:
+            return []
+        chunk = " ".join(self.current_chunk)
+        self.current_chunk = []
+        self.current_size = 0
+        return [chunk]
+
 class DocumentChunker:
-    def __init__(self, max_chunk_size: int = 30000):  # Gemini 的上下文窗口约为 30k 字符
+    def __init__(self, max_chunk_size: int = 30000, max_chunk_tokens: Optional[int] = None, output_tokens: int = 0):
+        # 字符模式：每块不超过 max_chunk_size 个字符
         self.max_chunk_size = max_chunk_size
+        # token 模式：设置 max_chunk_tokens 后按估算的 token 数装箱，估算比例按源语言选择
+        self.max_chunk_tokens = max_chunk_tokens
+        # 每次调用预留的输出 token，仅用于 ChunkPlan 的调用量估算
+        self.output_tokens = output_tokens
         self.document_processor = DocumentProcessor()
-        # 修改分隔符模式，使用固定宽度的 look-behind
+        # 句子边界模式，由 SentenceSegmenter 预编译为一个正则
         self.sentence_patterns = {
-            'general': r'[.。!！?？]\s*',  # 简化模式
-            'list': r'\n\s*',             # 简化模式
-            'section': r'\n\n+\s*',       # 简化模式
-            'technical': r'[;。;；]\s*'    # 简化模式
+            # 句末标点及其后的右引号/括号；半角标点后紧跟 ASCII 字符时不切分（避免切开 3.14、v1.2、a.b）
+            'general': r'[.!?。！？]+["\'”’)\]」』）]*(?!(?<=[.!?])[\x21-\x7e])',
+            # 列表项：换行后紧跟 - * • 的行单独成句
+            'list': r'\n(?=[ \t]*[-*•][ \t])',
+            # 段落：空行（可含空白）
+            'section': r'\n(?:[ \t]*\n)+',
+            'technical': r'[;。;；]\s*'    # 未启用
         }
+        self.segmenter = SentenceSegmenter(self.sentence_patterns)
+
+    @classmethod
+    def from_env(cls, output_tokens: int = 2048, prompt_tokens: int = 256) -> "DocumentChunker":
+        """
+        按环境变量创建分块器
+        CHUNK_MODE=tokens 时，每块的 token 上限 = CHUNK_TOKEN_BUDGET - 输出预留 - 提示词预留
+        """
+        max_chunk_size = int(os.getenv("MAX_CHUNK_SIZE", 30000))
+        output_tokens = int(os.getenv("CHUNK_OUTPUT_TOKENS", output_tokens))
+        if os.getenv("CHUNK_MODE", "chars").lower() != "tokens":
+            return cls(max_chunk_size, output_tokens=output_tokens)
+        budget = int(os.getenv("CHUNK_TOKEN_BUDGET", 32000))
+        prompt_tokens = int(os.getenv("CHUNK_PROMPT_TOKENS", prompt_tokens))
+        max_chunk_tokens = budget - output_tokens - prompt_tokens
+        if max_chunk_tokens <= 0:
+            raise ValueError(f"CHUNK_TOKEN_BUDGET {budget} leaves no room for input text")
+        return cls(max_chunk_size, max_chunk_tokens=max_chunk_tokens, output_tokens=output_tokens)
+
+    @property
+    def token_mode(self) -> bool:
+        return self.max_chunk_tokens is not None
+
+    def _packer(self, overlap: int, language: Optional[str]) -> _ChunkPacker:
+        if self.token_mode:
+            return _ChunkPacker(self.max_chunk_tokens, overlap, TokenEstimator.for_language(language))
+        return _ChunkPacker(self.max_chunk_size, overlap)
+
+    def estimate_tokens(self, text: str, language: Optional[str] = None) -> int:
+        """估算文本的 token 数（字符模式下同样可用，便于记录调用量）"""
+        return TokenEstimator.for_language(language).count(text)
 
     def split_by_sentences(self, text: str) -> List[str]:
-        """智能分割文本为句子"""
-        # 首先按段落分割
-        paragraphs = text.split('\n\n')
-        sentences = []
-        
-        for paragraph in paragraphs:
-            if not paragraph.strip():
-                continue
-                
-            # 检测是否是列表项
-            if re.match(r'^\s*[-*•]\s', paragraph):
-                # 按列表项分割
-                items = paragraph.split('\n')
-                sentences.extend(items)
-            else:
-                # 使用更简单的分割方法
-                for sent in re.split(r'([.。!！?？])\s*', paragraph):
-                    if sent.strip():
-                        sentences.append(sent.strip())
-                        
-        return sentences
-
-    def create_chunks(self, text: str, overlap: int = 2) -> List[str]:
+        """智能分割文本为句子：按段落、列表行和句末标点切分，句子保留末尾标点"""
+        return self.segmenter.split(text)
+
+    def sentence_spans(self, text: str) -> List[Span]:
+        """同 split_by_sentences，返回各句在 text 中的 (start, end) 偏移"""
+        return self.segmenter.spans(text)
+
+    def create_chunks(self, text: str, overlap: int = 2, language: Optional[str] = None) -> List[str]:
         """
         将文本分成多个块，保持上下文连贯性
         overlap: 重叠的句子数，确保上下文连续性
+        language: 源语言，token 模式下用于选择估算比例
         """
         sentences = self.split_by_sentences(text)
         if not sentences:
             return []
 
+        packer = self._packer(overlap, language)
         chunks = []
-        current_chunk = []
-        current_size = 0
-
-        for i, sentence in enumerate(sentences):
-            sentence_size = len(sentence)
-            
-            # 如果单个句子就超过了最大块大小，需要进一步分割
-            if sentence_size > self.max_chunk_size:
-                if current_chunk:
-                    chunks.append(" ".join(current_chunk))
-                    current_chunk = []
-                    current_size = 0
-                
-                # 按字符分割大句子
-                sub_chunks = [sentence[j:j + self.max_chunk_size] 
-                            for j in range(0, len(sentence), self.max_chunk_size)]
-                chunks.extend(sub_chunks)
-                continue
-
-            # 检查添加这个句子是否会超过块大小限制
-            if current_size + sentence_size > self.max_chunk_size:
-                chunks.append(" ".join(current_chunk))
-                # 保留最后 overlap 个句子作为下一个块的开始
-                current_chunk = current_chunk[-overlap:] if overlap > 0 else []
-                current_size = sum(len(s) for s in current_chunk)
+        for sentence in sentences:
+            chunks.extend(packer.add(sentence))
+        chunks.extend(packer.finish())
+        return chunks
 
-            current_chunk.append(sentence)
-            current_size += sentence_size
+    def plan_chunks(self, text: str, overlap: int = 2, language: Optional[str] = None) -> ChunkPlan:
+        """分块并估算每块的 token 数"""
+        chunks = self.create_chunks(text, overlap, language)
+        estimator = TokenEstimator.for_language(language)
+        return ChunkPlan(chunks, [estimator.count(chunk) for chunk in chunks], self.output_tokens)
 
-        # 添加最后一个块
-        if current_chunk:
-            chunks.append(" ".join(current_chunk))
+    def create_chunks_from_stream(self, segments: Iterable[str], overlap: int = 2, language: Optional[str] = None) -> Iterator[str]:
+        """
+        流式分块：逐段消费文本（如逐页、逐张幻灯片），块满即产出
+        结果与对各段按 '\n\n' 拼接后调用 create_chunks 一致（段边界处的空白可能不同）
+        """
+        packer = self._packer(overlap, language)
+        for segment in segments:
+            for sentence in self.split_by_sentences(segment):
+                yield from packer.add(sentence)
+        yield from packer.finish()
 
-        return chunks
+    async def acreate_chunks_from_stream(
+        self,
+        segments: AsyncIterable[str],
+        overlap: int = 2,
+        language: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """create_chunks_from_stream 的异步版本，用于边解析边提取术语"""
+        packer = self._packer(overlap, language)
+        async for segment in segments:
+            for sentence in self.split_by_sentences(segment):
+                for chunk in packer.add(sentence):
+                    yield chunk
+        for chunk in packer.finish():
+            yield chunk
 
     def merge_results(self, terms_lists: List[List[tuple]]) -> List[tuple]:
         """合并多个块的术语结果，去除重复项"""
@@ -111,33 +221,52 @@ class DocumentChunker:
 
         return merged_terms
 
-    def stream_chunks(self, file_obj: io.IOBase, chunk_size: int = 8192) -> Generator[str, None, None]:
-        """流式读取文件并生成文本块"""
-        buffer = ""
-        
+    def stream_chunks(
+        self,
+        file_obj: io.IOBase,
+        chunk_size: int = 8192,
+        overlap: int = 2,
+        language: Optional[str] = None
+    ) -> Generator[str, None, None]:
+        """
+        流式读取文件并生成文本块
+        使用增量 UTF-8 解码（读边界处的多字节字符不会丢失），每次只在新读入的文本中查找句末；
+        没有句末标点的文本最多缓存 max_chunk_size 个字符，内存占用与文件大小无关
+        """
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='ignore')
+        packer = self._packer(overlap, language)
+        # 最后一个句末之后、尚未处理的文本片段
+        pending: List[str] = []
+        pending_size = 0
+
+        def feed(text: str) -> Iterator[str]:
+            for sentence in self.split_by_sentences(text):
+                yield from packer.add(sentence)
+
         while True:
-            chunk = file_obj.read(chunk_size)
-            if not chunk:
-                # 处理最后的buffer
-                if buffer:
-                    yield from self.create_chunks(buffer)
+            raw = file_obj.read(chunk_size)
+            text = raw if isinstance(raw, str) else decoder.decode(raw, final=not raw)
+            if text:
+                last_sentence_end = max(text.rfind(mark) for mark in SENTENCE_END_MARKS)
+                if last_sentence_end != -1:
+                    # 处理到最后一个完整句子的文本，剩余部分留待下次
+                    pending.append(text[:last_sentence_end + 1])
+                    yield from feed(''.join(pending))
+                    rest = text[last_sentence_end + 1:]
+                    pending, pending_size = ([rest], len(rest)) if rest else ([], 0)
+                else:
+                    pending.append(text)
+                    pending_size += len(text)
+                    if pending_size >= self.max_chunk_size:
+                        # 长时间没有句末标点时强制处理，避免缓存无限增长
+                        yield from feed(''.join(pending))
+                        pending, pending_size = [], 0
+            if not raw:
                 break
-                
-            buffer += chunk.decode('utf-8', errors='ignore')
-            
-            # 找到最后一个完整的句子
-            last_sentence_end = max(
-                buffer.rfind('.'), buffer.rfind('。'),
-                buffer.rfind('!'), buffer.rfind('！'),
-                buffer.rfind('?'), buffer.rfind('？')
-            )
-            
-            if last_sentence_end != -1:
-                # 处理到最后一个完整句子的文本
-                text_to_process = buffer[:last_sentence_end + 1]
-                yield from self.create_chunks(text_to_process)
-                # 保留剩余的文本到buffer
-                buffer = buffer[last_sentence_end + 1:]
+
+        if pending:
+            yield from feed(''.join(pending))
+        yield from packer.finish()
 
     def process_large_file(self, file_path: str) -> Iterator[List[tuple]]:
         """处理大文件的方法"""
@@ -197,15 +326,13 @@ class DocumentChunker:
     async def process_document(self, file_path: str) -> Iterator[tuple[str, ProcessingStats]]:
         """处理文档并返回分块结果"""
         try:
-            # 获取文档元数据
-            metadata = self.document_processor.get_document_metadata(file_path)
-            
             # 检查文件大小
-            if metadata['file_size'] > 100 * 1024 * 1024:  # 100MB
+            if os.path.getsize(file_path) > 100 * 1024 * 1024:  # 100MB
                 raise ValueError("File too large")
             
-            # 提取文本
-            text = self.document_processor.process_file(file_path)
+            # 一次解析同时获取文本和元数据
+            result = self.document_processor.extract(file_path)
+            text, metadata = result.text, result.metadata
             
             # 使用现有的分块逻辑处理文本
             async for chunk, stats in self.create_chunks_with_stats(text):
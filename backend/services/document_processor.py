@@ -1,14 +1,25 @@
 # backend/services/document_processor.py 
 # 文档处理识别不同类型文件器
-from typing import List, Optional
+from typing import List, Optional, Iterator, BinaryIO, Union
 import io
-from docx import Document
-from pptx import Presentation
-from pypdf import PdfReader
-import markdown
-import bs4
 import os
-import tempfile
+from dataclasses import dataclass, field
+from . import ooxml_extractor, markdown_text
+from .segment_table import LocatedSegment, PAGE, SLIDE, PARAGRAPH, TABLE_ROW, BLOCK
+
+# docx / pptx / pypdf / markdown / bs4 导入较慢，只在首次解析对应格式时导入
+
+# 提取逻辑版本：修改提取结果时递增，使提取缓存失效
+EXTRACTOR_VERSION = "3"
+
+# 文件路径或二进制文件对象（如 io.BytesIO）
+Source = Union[str, BinaryIO]
+
+@dataclass
+class ExtractionResult:
+    """一次解析得到的文本和元数据"""
+    text: str
+    metadata: dict = field(default_factory=dict)
 
 class DocumentProcessor:
     """文档处理器：支持不同格式文档的文本提取"""
@@ -22,6 +33,10 @@ class DocumentProcessor:
             '.pptx': self.process_pptx,
             '.pdf': self.process_pdf
         }
+        # DOCX / PPTX 默认直接解析 zip 包中的 XML，关闭时使用 python-docx / python-pptx
+        self.fast_ooxml = os.getenv("FAST_OOXML_EXTRACTOR", "true").lower() == "true"
+        # Markdown 默认逐行去除标记，含原始 HTML 的文档仍走 markdown + BeautifulSoup
+        self.fast_markdown = os.getenv("FAST_MARKDOWN_EXTRACTOR", "true").lower() == "true"
 
     def can_process(self, filename: str) -> bool:
         """检查是否支持处理该文件类型"""
@@ -36,46 +51,97 @@ class DocumentProcessor:
             
         return self.supported_extensions[ext](file_path)
 
-    def process_text(self, file_path: str) -> str:
+    def _read_text(self, file_path: Source) -> str:
+        """读取 UTF-8 文本，路径和文件对象都按通用换行符处理"""
+        if isinstance(file_path, str):
+            with open(file_path, 'r', encoding='utf-8') as f:
+                return f.read()
+        wrapper = io.TextIOWrapper(file_path, encoding='utf-8')
+        try:
+            return wrapper.read()
+        finally:
+            # 解除绑定，避免关闭调用方的文件对象
+            wrapper.detach()
+
+    def process_text(self, file_path: Source) -> str:
         """处理纯文本文件"""
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return f.read()
+        return self._read_text(file_path)
 
-    def process_markdown(self, file_path: str) -> str:
+    def process_markdown(self, file_path: Source) -> str:
         """处理 Markdown 文件"""
-        with open(file_path, 'r', encoding='utf-8') as f:
-            md_text = f.read()
-            # 转换 Markdown 为 HTML
-            html = markdown.markdown(md_text)
-            # 使用 BeautifulSoup 提取纯文本
-            soup = bs4.BeautifulSoup(html, 'html.parser')
-            return soup.get_text(separator='\n\n')
-
-    def process_docx(self, file_path: str) -> str:
+        md_text = self._read_text(file_path)
+        if self._use_fast_markdown(md_text):
+            return markdown_text.markdown_to_text(md_text)
+
+        import markdown
+        import bs4
+
+        # 转换 Markdown 为 HTML
+        html = markdown.markdown(md_text)
+        # 使用 BeautifulSoup 提取纯文本
+        soup = bs4.BeautifulSoup(html, 'html.parser')
+        return soup.get_text(separator='\n\n')
+
+    def _use_fast_markdown(self, md_text: str) -> bool:
+        return self.fast_markdown and not markdown_text.needs_html_renderer(md_text)
+
+    def process_docx(self, file_path: Source) -> str:
         """处理 Word 文档"""
-        doc = Document(file_path)
-        text_parts = []
-        
+        return '\n\n'.join(self.iter_docx_blocks(file_path))
+
+    def iter_docx_blocks(self, file_path: Source) -> Iterator[str]:
+        """逐段落、逐表格行生成 Word 文档文本"""
+        for *_, text in self.iter_docx_located(file_path):
+            yield text
+
+    def iter_docx_located(self, file_path: Source) -> Iterator[LocatedSegment]:
+        """同 iter_docx_blocks，附带段落序号或 (表格序号, 行号)"""
+        if self.fast_ooxml:
+            yield from ooxml_extractor.iter_docx_located(file_path)
+            return
+        from docx import Document
+        yield from self._docx_located(Document(file_path))
+
+    def _docx_blocks(self, doc) -> Iterator[str]:
+        for *_, text in self._docx_located(doc):
+            yield text
+
+    def _docx_located(self, doc) -> Iterator[LocatedSegment]:
         # 处理段落
-        for para in doc.paragraphs:
+        for index, para in enumerate(doc.paragraphs):
             if para.text.strip():
-                text_parts.append(para.text)
+                yield PARAGRAPH, index, -1, para.text
         
         # 处理表格
-        for table in doc.tables:
-            for row in table.rows:
+        for table_index, table in enumerate(doc.tables):
+            for row_index, row in enumerate(table.rows):
                 row_text = ' | '.join(cell.text.strip() for cell in row.cells)
                 if row_text.strip():
-                    text_parts.append(row_text)
-        
-        return '\n\n'.join(text_parts)
+                    yield TABLE_ROW, table_index, row_index, row_text
 
-    def process_pptx(self, file_path: str) -> str:
+    def process_pptx(self, file_path: Source) -> str:
         """处理 PowerPoint 文档"""
-        prs = Presentation(file_path)
-        text_parts = []
-        
-        for slide in prs.slides:
+        return '\n\n'.join(self.iter_pptx_slides(file_path))
+
+    def iter_pptx_slides(self, file_path: Source) -> Iterator[str]:
+        """逐张幻灯片生成文本"""
+        for *_, text in self.iter_pptx_located(file_path):
+            yield text
+
+    def iter_pptx_located(self, file_path: Source) -> Iterator[LocatedSegment]:
+        """同 iter_pptx_slides，附带幻灯片序号"""
+        if self.fast_ooxml:
+            yield from ooxml_extractor.iter_pptx_located(file_path)
+            return
+        from pptx import Presentation
+        yield from self._pptx_located(Presentation(file_path))
+
+    def _pptx_slides(self, prs) -> Iterator[str]:
+        for *_, text in self._pptx_located(prs):
+            yield text
+
+    def _pptx_located(self, prs) -> Iterator[LocatedSegment]:
+        for index, slide in enumerate(prs.slides):
             slide_texts = []
             
             # 处理形状中的文本
@@ -98,21 +164,112 @@ class DocumentProcessor:
                         slide_texts.append('\n'.join(table_texts))
             
             if slide_texts:
-                text_parts.append('\n'.join(slide_texts))
-        
-        return '\n\n'.join(text_parts)
+                yield SLIDE, index, -1, '\n'.join(slide_texts)
 
-    def process_pdf(self, file_path: str) -> str:
+    def process_pdf(self, file_path: Source) -> str:
         """处理 PDF 文档"""
-        reader = PdfReader(file_path)
-        text_parts = []
+        return '\n\n'.join(self.iter_pdf_pages(file_path))
+
+    def iter_pdf_pages(self, file_path: Source, start: int = 0, end: Optional[int] = None) -> Iterator[str]:
+        """逐页生成 PDF 文本，可只处理 [start, end) 范围内的页"""
+        for *_, text in self.iter_pdf_located(file_path, start, end):
+            yield text
+
+    def iter_pdf_located(self, file_path: Source, start: int = 0, end: Optional[int] = None) -> Iterator[LocatedSegment]:
+        """同 iter_pdf_pages，附带页序号"""
+        from pypdf import PdfReader
+        yield from self._pdf_located(PdfReader(file_path).pages, start, end)
+
+    def _pdf_pages(self, pages, start: int = 0, end: Optional[int] = None) -> Iterator[str]:
+        for *_, text in self._pdf_located(pages, start, end):
+            yield text
+
+    def _pdf_located(self, pages, start: int = 0, end: Optional[int] = None) -> Iterator[LocatedSegment]:
+        end = len(pages) if end is None else min(end, len(pages))
         
-        for page in reader.pages:
-            text = page.extract_text()
+        for index in range(start, end):
+            text = pages[index].extract_text()
             if text.strip():
-                text_parts.append(text)
-        
-        return '\n\n'.join(text_parts)
+                yield PAGE, index, -1, text
+
+    def count_pdf_pages(self, file_path: Source) -> int:
+        """获取 PDF 页数"""
+        from pypdf import PdfReader
+        return len(PdfReader(file_path).pages)
+
+    def iter_segments(self, file_path: str) -> Iterator[str]:
+        """按页（PDF）、幻灯片（PPTX）或段落（DOCX）逐段生成文本，拼接后与 process_file 结果一致"""
+        for *_, text in self.iter_located_segments(file_path):
+            yield text
+
+    def iter_located_segments(self, file_path: str) -> Iterator[LocatedSegment]:
+        """同 iter_segments，每段附带 (类型, 位置, 子位置)"""
+        ext = os.path.splitext(file_path.lower())[1]
+        if ext == '.pdf':
+            from pypdf import PdfReader
+            yield from self._pdf_located(PdfReader(file_path).pages)
+        elif ext == '.pptx':
+            yield from self.iter_pptx_located(file_path)
+        elif ext == '.docx':
+            yield from self.iter_docx_located(file_path)
+        elif ext == '.md' and self.fast_markdown:
+            md_text = self._read_text(file_path)
+            if self._use_fast_markdown(md_text):
+                blocks = markdown_text.iter_markdown_blocks(md_text.splitlines())
+            else:
+                blocks = [self.process_markdown(file_path)]
+            for index, text in enumerate(block for block in blocks if block):
+                yield BLOCK, index, -1, text
+        else:
+            text = self.process_file(file_path)
+            if text:
+                yield BLOCK, 0, -1, text
+
+    def extract(self, file_path: str) -> ExtractionResult:
+        """只解析一次文件，同时返回文本和页数、段落数等元数据"""
+        ext = os.path.splitext(file_path.lower())[1]
+        if ext not in self.supported_extensions:
+            raise ValueError(f"Unsupported file type: {ext}")
+
+        metadata = {
+            'file_size': os.path.getsize(file_path),
+            'file_type': ext[1:],  # 移除点号
+        }
+        if ext == '.pdf':
+            from pypdf import PdfReader
+            reader = PdfReader(file_path)
+            text = '\n\n'.join(self._pdf_pages(reader.pages))
+            metadata.update({
+                'pages': len(reader.pages),
+                'info': reader.metadata
+            })
+        elif ext == '.docx' and self.fast_ooxml:
+            counts = {}
+            text = '\n\n'.join(ooxml_extractor.iter_docx_blocks(file_path, counts))
+            metadata.update(counts)
+        elif ext == '.pptx' and self.fast_ooxml:
+            counts = {}
+            text = '\n\n'.join(ooxml_extractor.iter_pptx_slides(file_path, counts))
+            metadata.update(counts)
+        elif ext == '.docx':
+            from docx import Document
+            doc = Document(file_path)
+            text = '\n\n'.join(self._docx_blocks(doc))
+            metadata.update({
+                'paragraphs': len(doc.paragraphs),
+                'sections': len(doc.sections)
+            })
+        elif ext == '.pptx':
+            from pptx import Presentation
+            prs = Presentation(file_path)
+            text = '\n\n'.join(self._pptx_slides(prs))
+            metadata.update({
+                'slides': len(prs.slides)
+            })
+        else:
+            text = self.supported_extensions[ext](file_path)
+
+        return ExtractionResult(text=text, metadata=metadata)
 
     def get_document_metadata(self, file_path: str) -> dict:
         """获取文档元数据"""
@@ -124,18 +281,21 @@ class DocumentProcessor:
         
         try:
             if ext == '.pdf':
+                from pypdf import PdfReader
                 reader = PdfReader(file_path)
                 metadata.update({
                     'pages': len(reader.pages),
                     'info': reader.metadata
                 })
             elif ext == '.docx':
+                from docx import Document
                 doc = Document(file_path)
                 metadata.update({
                     'paragraphs': len(doc.paragraphs),
                     'sections': len(doc.sections)
                 })
             elif ext == '.pptx':
+                from pptx import Presentation
                 prs = Presentation(file_path)
                 metadata.update({
                     'slides': len(prs.slides)
@@ -144,24 +304,3 @@ class DocumentProcessor:
             metadata['error'] = str(e)
             
         return metadata
-
-    async def process_file_async(self, content: bytes, filename: str) -> str:
-        """异步处理文件内容"""
-        # 根据文件扩展名选择处理方法
-        ext = os.path.splitext(filename.lower())[1]
-        
-        if ext not in self.supported_extensions:
-            raise ValueError(f"Unsupported file type: {ext}")
-            
-        # 创建临时文件
-        with tempfile.NamedTemporaryFile(suffix=ext, delete=False) as temp_file:
-            temp_file.write(content)
-            temp_path = temp_file.name
-        
-        try:
-            # 使用现有的处理方法
-            text = self.supported_extensions[ext](temp_path)
-            return text
-        finally:
-            # 清理临时文件
-            os.unlink(temp_path)
\ No newline at end of file
@@ -0,0 +1,241 @@
+# backend/services/extraction_cache.py
+# 文档文本提取缓存：按文件内容哈希落盘，相同文件重复上传时跳过解析；按段存储，保留页/幻灯片边界
+import os
+import json
+import zlib
+import asyncio
+import hashlib
+import logging
+import tempfile
+import threading
+from typing import Iterable, List, Optional
+from .document_processor import EXTRACTOR_VERSION
+from .segment_table import LocatedSegment, SegmentTable
+
+logger = logging.getLogger(__name__)
+
+CACHE_SUFFIX = ".json.z"
+
+# 条目存储格式版本：每行一段 [类型, 位置, 子位置, 文本]，最后一行为元数据
+CACHE_FORMAT = "2"
+
+
+class ExtractionCache:
+    """磁盘缓存：zlib 压缩存储提取结果，按访问时间（mtime）做 LRU 淘汰"""
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int = 512 * 1024 * 1024,
+        version: str = EXTRACTOR_VERSION,
+        enabled: bool = True
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        # 提取逻辑变化时修改版本号，旧条目不再命中并随 LRU 淘汰
+        self.version = version
+        self.enabled = enabled
+        self._size_bytes: Optional[int] = None
+        # 条目在多个线程中发布（asyncio.to_thread），大小统计与淘汰需要互斥
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_env(cls) -> "ExtractionCache":
+        return cls(
+            directory=os.getenv("EXTRACTION_CACHE_DIR") or os.path.join(tempfile.gettempdir(), "extraction-cache"),
+            max_bytes=int(os.getenv("EXTRACTION_CACHE_MAX_BYTES", 512 * 1024 * 1024)),
+            enabled=os.getenv("EXTRACTION_CACHE_ENABLED", "true").lower() == "true"
+        )
+
+    async def get(self, content_hash: str, filename: str) -> Optional[dict]:
+        """查询缓存，命中时返回 {"segments": SegmentTable, "metadata": {...}}"""
+        if not self.enabled:
+            return None
+        try:
+            entry = await asyncio.to_thread(self._read, self._path(content_hash, filename))
+        except Exception as e:
+            logger.warning(f"Extraction cache read failed: {str(e)}")
+            entry = None
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    async def put(self, content_hash: str, filename: str, segments: SegmentTable, metadata: Optional[dict] = None):
+        """写入提取结果，写入失败只记录日志"""
+        writer = self.writer(content_hash, filename)
+        if writer is None:
+            return
+        try:
+            await writer.add(segments.located())
+            await writer.commit(metadata)
+        finally:
+            await writer.abort()
+
+    def writer(self, content_hash: str, filename: str) -> Optional["CacheWriter"]:
+        """创建逐段写入的缓存条目（流式解析时使用，不必在内存中保留整个文档）；缓存关闭时返回 None"""
+        if not self.enabled:
+            return None
+        return CacheWriter(self, self._path(content_hash, filename))
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "version": self.version,
+            "size_bytes": self._size_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+    def _path(self, content_hash: str, filename: str) -> str:
+        # 扩展名决定解析方式，相同内容不同扩展名的结果不同
+        ext = os.path.splitext(filename.lower())[1]
+        key = hashlib.sha256(f"{CACHE_FORMAT}\x1f{self.version}\x1f{ext}\x1f{content_hash}".encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, key[:2], key + CACHE_SUFFIX)
+
+    def _read(self, path: str) -> Optional[dict]:
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        # 更新 mtime 作为最近访问时间
+        os.utime(path)
+        # JSON 会转义字符串中的换行，按行切分即可还原各段
+        lines = zlib.decompress(data).decode('utf-8').split('\n')
+        segments = SegmentTable.from_located(json.loads(line) for line in lines[:-1])
+        return {"segments": segments, "metadata": json.loads(lines[-1])}
+
+    def _publish(self, temp_path: str, path: str, size: int):
+        """把写好的临时文件发布为正式条目并记录大小，超过上限时淘汰；替换已有条目时扣除旧条目的大小"""
+        with self._lock:
+            try:
+                replaced = os.stat(path).st_size
+            except FileNotFoundError:
+                replaced = 0
+            # 原子替换，避免并发读到半个文件
+            os.replace(temp_path, path)
+            self.writes += 1
+            if self._size_bytes is None:
+                self._size_bytes = sum(size for _, _, size in self._scan())
+            else:
+                self._size_bytes += size - replaced
+            if self._size_bytes > self.max_bytes:
+                self._evict()
+
+    def _scan(self):
+        """列出所有缓存文件的 (mtime, path, size)"""
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith(CACHE_SUFFIX):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, path, stat.st_size))
+        return entries
+
+    def _evict(self):
+        """按最近访问时间从旧到新删除，直到总大小降到上限的 90%（调用方持有 _lock）"""
+        entries = sorted(self._scan())
+        total = sum(size for _, _, size in entries)
+        target = self.max_bytes * 0.9
+        for _, path, size in entries:
+            if total <= target:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            self.evictions += 1
+        self._size_bytes = total
+
+
+class CacheWriter:
+    """增量写入一个缓存条目：各段用同一个 zlib 压缩流写入临时文件，commit 时原子重命名为正式条目
+
+    写入失败或压缩后超过缓存上限时放弃该条目，只记录日志；未 commit 的条目由 abort 删除。
+    """
+
+    def __init__(self, cache: ExtractionCache, path: str):
+        self.cache = cache
+        self.path = path
+        self._compressor = zlib.compressobj()
+        self._file = None
+        self._temp_path: Optional[str] = None
+        self._size = 0
+        self._failed = False
+
+    async def add(self, segments: Iterable[LocatedSegment]):
+        """追加若干段 (类型, 位置, 子位置, 文本)"""
+        if self._failed:
+            return
+        lines = [json.dumps(segment, ensure_ascii=False) + '\n' for segment in segments]
+        await self._run(self._write, lines)
+
+    async def commit(self, metadata: Optional[dict] = None):
+        """写入元数据并发布条目"""
+        if self._failed:
+            return
+        await self._run(self._finish, metadata or {})
+
+    async def abort(self):
+        """删除未发布的临时文件；已 commit 时不做任何事"""
+        if self._temp_path is not None:
+            await asyncio.to_thread(self._discard)
+
+    async def _run(self, fn, *args):
+        try:
+            await asyncio.to_thread(fn, *args)
+        except Exception as e:
+            logger.warning(f"Extraction cache write failed: {str(e)}")
+            self._failed = True
+            await self.abort()
+
+    def _write(self, lines: List[str]):
+        if self._file is None:
+            directory = os.path.dirname(self.path)
+            os.makedirs(directory, exist_ok=True)
+            fd, self._temp_path = tempfile.mkstemp(dir=directory)
+            self._file = os.fdopen(fd, 'wb')
+        self._emit(self._compressor.compress(''.join(lines).encode('utf-8')))
+
+    def _finish(self, metadata: dict):
+        # 元数据为最后一行，不以换行结尾
+        self._write([json.dumps(metadata, ensure_ascii=False)])
+        self._emit(self._compressor.flush())
+        self._file.close()
+        self.cache._publish(self._temp_path, self.path, self._size)
+        self._temp_path = None
+
+    def _emit(self, data: bytes):
+        if not data:
+            return
+        self._size += len(data)
+        if self._size > self.cache.max_bytes:
+            raise ValueError("Extraction cache entry exceeds the cache size limit")
+        self._file.write(data)
+
+    def _discard(self):
+        if self._file is not None and not self._file.closed:
+            self._file.close()
+        if self._temp_path is not None:
+            try:
+                os.unlink(self._temp_path)
+            except FileNotFoundError:
+                pass
+            self._temp_path = None
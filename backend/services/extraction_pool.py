@@ -0,0 +1,241 @@
+# backend/services/extraction_pool.py
+# 文档解析进程池：把 CPU 密集的解析移出事件循环
+import os
+import asyncio
+import logging
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, List, Optional, Tuple
+from .document_processor import DocumentProcessor
+from .segment_table import LocatedSegment, SegmentTable
+
+logger = logging.getLogger(__name__)
+
+
+class ExtractionQueueFullError(Exception):
+    """等待解析的任务过多"""
+    pass
+
+
+class ExtractionTimeoutError(Exception):
+    """单个文档解析超时"""
+    pass
+
+
+def _warm_worker():
+    """子进程初始化：预先导入解析库，避免首个任务承担导入开销"""
+    import docx  # noqa: F401
+    import pptx  # noqa: F401
+    import pypdf  # noqa: F401
+    import markdown  # noqa: F401
+    import bs4  # noqa: F401
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+def _count_pdf_pages(file_path: str) -> int:
+    return DocumentProcessor().count_pdf_pages(file_path)
+
+
+def _extract_located(file_path: str) -> List[LocatedSegment]:
+    """在子进程中按页、幻灯片或段落提取文本段"""
+    return list(DocumentProcessor().iter_located_segments(file_path))
+
+
+def _extract_pdf_range(file_path: str, start: int, end: int) -> List[LocatedSegment]:
+    """在子进程中提取 [start, end) 范围内页面的文本"""
+    return list(DocumentProcessor().iter_pdf_located(file_path, start, end))
+
+
+class ExtractionPool:
+    """带超时和排队上限的解析进程池，workers 为 0 时退化为线程执行"""
+
+    def __init__(
+        self,
+        workers: int = 2,
+        timeout: float = 120,
+        max_pending: int = 16,
+        start_method: str = "spawn",
+        pdf_parallel_min_pages: int = 64,
+        pdf_page_batch_size: int = 32
+    ):
+        self.workers = workers
+        self.timeout = timeout
+        self.max_pending = max_pending
+        self.start_method = start_method
+        # 页数少于该值的 PDF 串行解析，避免拆分和重复打开文件的开销大于收益
+        self.pdf_parallel_min_pages = pdf_parallel_min_pages
+        self.pdf_page_batch_size = max(1, pdf_page_batch_size)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+        self.completed = 0
+        self.timeouts = 0
+        self.rejected = 0
+        self.parallel_documents = 0
+
+    @classmethod
+    def from_env(cls) -> "ExtractionPool":
+        return cls(
+            workers=int(os.getenv("EXTRACTION_WORKERS", os.cpu_count() or 2)),
+            timeout=float(os.getenv("EXTRACTION_TIMEOUT", 120)),
+            max_pending=int(os.getenv("EXTRACTION_MAX_PENDING", 16)),
+            start_method=os.getenv("EXTRACTION_START_METHOD", "spawn"),
+            pdf_parallel_min_pages=int(os.getenv("PDF_PARALLEL_MIN_PAGES", 64)),
+            pdf_page_batch_size=int(os.getenv("PDF_PAGE_BATCH_SIZE", 32))
+        )
+
+    async def start(self):
+        """创建进程池并预热所有 worker"""
+        if self.workers <= 0:
+            return
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context(self.start_method),
+            initializer=_warm_worker
+        )
+        loop = asyncio.get_running_loop()
+        pids = await asyncio.gather(*(
+            loop.run_in_executor(self._executor, _ping) for _ in range(self.workers)
+        ))
+        logger.info(f"Extraction pool warmed up with {len(set(pids))} worker processes")
+
+    def shutdown(self):
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """在进程池中执行 fn，超过排队上限或超时时抛出异常"""
+        return await self._guarded(self._execute(fn, *args))
+
+    async def extract(self, file_path: str, progress: Optional[Callable[[int, int], None]] = None) -> SegmentTable:
+        """按页、幻灯片或段落提取文档文本段，大 PDF 按页拆分到多个进程并行解析
+
+        progress 为 (已解析页数, 总页数) 回调，仅在 PDF 按页并行解析时每完成一批调用一次。
+        """
+        if file_path.lower().endswith('.pdf') and self._executor and self.workers > 1:
+            return await self._guarded(self._extract_pdf(file_path, progress))
+        return SegmentTable.from_located(await self.run(_extract_located, file_path))
+
+    async def iter_segments(self, file_path: str) -> AsyncIterator[List[LocatedSegment]]:
+        """在进程池中解析文档，按页序分批产出 (类型, 位置, 子位置, 文本)
+
+        大 PDF 按页范围分批，最多同时解析 workers 批；其他格式整篇为一批。
+        与 extract 一样受排队上限和超时约束，超时只计等待解析结果的时间，不含调用方处理各批的时间。
+        """
+        self._reserve()
+        loop = asyncio.get_running_loop()
+        budget = self.timeout
+        parallel = False
+        in_flight: Deque[asyncio.Future] = deque()
+
+        async def wait(awaitable: Awaitable[Any]) -> Any:
+            nonlocal budget
+            started = loop.time()
+            try:
+                return await asyncio.wait_for(awaitable, max(budget, 0))
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                raise ExtractionTimeoutError(f"Document extraction timed out after {self.timeout:.0f}s")
+            finally:
+                budget -= loop.time() - started
+
+        try:
+            ranges = []
+            if file_path.lower().endswith('.pdf') and self._executor and self.workers > 1:
+                page_count = await wait(self._execute(_count_pdf_pages, file_path))
+                if page_count >= self.pdf_parallel_min_pages:
+                    ranges = self._page_ranges(page_count)
+                    parallel = True
+            if not parallel:
+                in_flight.append(asyncio.ensure_future(self._execute(_extract_located, file_path)))
+
+            pending_ranges = deque(ranges)
+            while in_flight or pending_ranges:
+                # 预先提交的批数不超过 workers，调用方处理较慢时已解析的页不会无限堆积
+                while pending_ranges and len(in_flight) < self.workers:
+                    start, end = pending_ranges.popleft()
+                    in_flight.append(asyncio.ensure_future(self._execute(_extract_pdf_range, file_path, start, end)))
+                yield await wait(in_flight.popleft())
+
+            self.completed += 1
+            if parallel:
+                self.parallel_documents += 1
+        finally:
+            for future in in_flight:
+                future.cancel()
+            self._pending -= 1
+
+    def _page_ranges(self, page_count: int) -> List[Tuple[int, int]]:
+        return [
+            (start, min(start + self.pdf_page_batch_size, page_count))
+            for start in range(0, page_count, self.pdf_page_batch_size)
+        ]
+
+    async def _extract_pdf(self, file_path: str, progress: Optional[Callable[[int, int], None]] = None) -> SegmentTable:
+        page_count = await self._execute(_count_pdf_pages, file_path)
+        if page_count < self.pdf_parallel_min_pages:
+            return SegmentTable.from_located(await self._execute(_extract_located, file_path))
+
+        ranges = self._page_ranges(page_count)
+        done_pages = 0
+
+        async def extract_range(start: int, end: int) -> List[LocatedSegment]:
+            nonlocal done_pages
+            batch = await self._execute(_extract_pdf_range, file_path, start, end)
+            done_pages += end - start
+            if progress is not None:
+                progress(done_pages, page_count)
+            return batch
+
+        results = await asyncio.gather(*(extract_range(start, end) for start, end in ranges))
+        self.parallel_documents += 1
+        # 按页序合并，与串行解析结果一致
+        table = SegmentTable()
+        for batch in results:
+            table.extend(batch)
+        return table
+
+    def _execute(self, fn: Callable[..., Any], *args: Any) -> Awaitable[Any]:
+        if self._executor is None:
+            return asyncio.to_thread(fn, *args)
+        return asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def _guarded(self, awaitable: Awaitable[Any]) -> Any:
+        """排队上限和超时控制，一个文档只计一次，无论拆成多少批"""
+        try:
+            self._reserve()
+        except ExtractionQueueFullError:
+            if asyncio.iscoroutine(awaitable):
+                awaitable.close()
+            raise
+        try:
+            # 超时后子进程仍会跑完当前任务，但调用方不再等待
+            result = await asyncio.wait_for(awaitable, self.timeout)
+            self.completed += 1
+            return result
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise ExtractionTimeoutError(f"Document extraction timed out after {self.timeout:.0f}s")
+        finally:
+            self._pending -= 1
+
+    def _reserve(self):
+        """占用一个排队名额，超过上限时抛出 ExtractionQueueFullError"""
+        if self._pending >= self.max_pending:
+            self.rejected += 1
+            raise ExtractionQueueFullError("Too many documents waiting for extraction")
+        self._pending += 1
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "pending": self._pending,
+            "completed": self.completed,
+            "timeouts": self.timeouts,
+            "rejected": self.rejected,
+            "parallel_pdf_documents": self.parallel_documents
+        }
@@ -10,13 +10,16 @@ import logging
 import traceback
 from sqlalchemy.orm import Session
 from models.glossary import Glossary, GlossaryEntry
+from .http_client import get_http_client
 
 # 添加 logger 配置
 logger = logging.getLogger(__name__)
 
 class GlossaryManager:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, client: Optional[httpx.AsyncClient] = None):
         self.db = db
+        # 复用进程级共享客户端
+        self.client = client or get_http_client()
         self.api_key = os.getenv("DEEPL_API_KEY")
         self.api_type = os.getenv("DEEPL_API_TYPE", "free")
         # 更新到 v3 API
@@ -41,17 +44,16 @@ class GlossaryManager:
             if not self.validate_glossary_payload(glossary_payload):
                 raise ValueError("Invalid glossary payload")
 
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.base_url}/glossaries",
-                    json=glossary_payload,
-                    headers=self.headers
-                )
-                response.raise_for_status()
-                result = response.json()
+            response = await self.client.post(
+                f"{self.base_url}/glossaries",
+                json=glossary_payload,
+                headers=self.headers
+            )
+            response.raise_for_status()
+            result = response.json()
                 
-                logger.info(f"Successfully created glossary with ID: {result.get('glossary_id')}")
-                return result
+            logger.info(f"Successfully created glossary with ID: {result.get('glossary_id')}")
+            return result
 
         except httpx.HTTPError as e:
             logger.error(f"HTTP error creating glossary: {str(e)}")
@@ -64,34 +66,31 @@ class GlossaryManager:
 
     async def list_glossaries(self) -> List[dict]:
         """获取所有术语表列表 (GET /v3/glossaries)"""
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.base_url}/glossaries",
-                headers=self.headers
-            )
-            response.raise_for_status()
-            return response.json()["glossaries"]
+        response = await self.client.get(
+            f"{self.base_url}/glossaries",
+            headers=self.headers
+        )
+        response.raise_for_status()
+        return response.json()["glossaries"]
 
     async def get_glossary(self, glossary_id: str) -> dict:
         """获取特定术语表信息 (GET /v3/glossaries/{glossary_id})"""
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.base_url}/glossaries/{glossary_id}",
-                headers=self.headers
-            )
-            response.raise_for_status()
-            return response.json()
+        response = await self.client.get(
+            f"{self.base_url}/glossaries/{glossary_id}",
+            headers=self.headers
+        )
+        response.raise_for_status()
+        return response.json()
 
     async def get_entries(self, glossary_id: str) -> str:
         """获取术语表条目"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.base_url}/glossaries/{glossary_id}/entries",
-                    headers=self.headers
-                )
-                response.raise_for_status()
-                return response.text
+            response = await self.client.get(
+                f"{self.base_url}/glossaries/{glossary_id}/entries",
+                headers=self.headers
+            )
+            response.raise_for_status()
+            return response.text
         except Exception as e:
             logger.error(f"Error getting glossary entries: {str(e)}")
             return ""  # 返回空字符串而不是抛出异常，这样可以继续处理
@@ -104,16 +103,15 @@ class GlossaryManager:
         if not self.validate_glossary_payload(payload):
             raise ValueError("Invalid glossary payload")
 
-        async with httpx.AsyncClient() as client:
-            response = await client.patch(
-                f"{self.base_url}/glossaries/{glossary_id}",
-                headers=self.headers,
-                json=payload
-            )
-            response.raise_for_status()
-            result = response.json()
-            self._cache_glossary(glossary_id, result)
-            return result
+        response = await self.client.patch(
+            f"{self.base_url}/glossaries/{glossary_id}",
+            headers=self.headers,
+            json=payload
+        )
+        response.raise_for_status()
+        result = response.json()
+        self._cache_glossary(glossary_id, result)
+        return result
 
     async def replace_glossary(self, glossary_id: str, payload: dict) -> dict:
         """
@@ -123,27 +121,25 @@ class GlossaryManager:
         if not self.validate_glossary_payload(payload):
             raise ValueError("Invalid glossary payload")
 
-        async with httpx.AsyncClient() as client:
-            response = await client.put(
-                f"{self.base_url}/glossaries/{glossary_id}",
-                headers=self.headers,
-                json=payload
-            )
-            response.raise_for_status()
-            result = response.json()
-            self._cache_glossary(glossary_id, result)
-            return result
+        response = await self.client.put(
+            f"{self.base_url}/glossaries/{glossary_id}",
+            headers=self.headers,
+            json=payload
+        )
+        response.raise_for_status()
+        result = response.json()
+        self._cache_glossary(glossary_id, result)
+        return result
 
     async def delete_glossary(self, glossary_id: str) -> None:
         """删除术语表 (DELETE /v3/glossaries/{glossary_id})"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.delete(
-                    f"{self.base_url}/glossaries/{glossary_id}",
-                    headers=self.headers
-                )
-                response.raise_for_status()
-                logger.info(f"Successfully deleted glossary {glossary_id} from DeepL")
+            response = await self.client.delete(
+                f"{self.base_url}/glossaries/{glossary_id}",
+                headers=self.headers
+            )
+            response.raise_for_status()
+            logger.info(f"Successfully deleted glossary {glossary_id} from DeepL")
                 
         except httpx.HTTPError as e:
             logger.error(f"HTTP error deleting glossary {glossary_id}: {str(e)}")
@@ -156,23 +152,22 @@ class GlossaryManager:
 
     async def delete_dictionary(self, glossary_id: str, source_lang: str, target_lang: str) -> None:
         """删除特定语言对的字典"""
-        async with httpx.AsyncClient() as client:
-            response = await client.delete(
-                f"{self.base_url}/glossaries/{glossary_id}/dictionaries",
-                headers=self.headers,
-                params={
-                    "source_lang": source_lang,
-                    "target_lang": target_lang
-                }
-            )
-            response.raise_for_status()
-            # 更新缓存
-            cached = self.get_cached_glossary(glossary_id)
-            if cached:
-                cached["dictionaries"] = [d for d in cached["dictionaries"] 
-                                        if not (d["source_lang"] == source_lang and 
-                                               d["target_lang"] == target_lang)]
-                self._cache_glossary(glossary_id, cached)
+        response = await self.client.delete(
+            f"{self.base_url}/glossaries/{glossary_id}/dictionaries",
+            headers=self.headers,
+            params={
+                "source_lang": source_lang,
+                "target_lang": target_lang
+            }
+        )
+        response.raise_for_status()
+        # 更新缓存
+        cached = self.get_cached_glossary(glossary_id)
+        if cached:
+            cached["dictionaries"] = [d for d in cached["dictionaries"] 
+                                    if not (d["source_lang"] == source_lang and 
+                                           d["target_lang"] == target_lang)]
+            self._cache_glossary(glossary_id, cached)
 
     def validate_glossary_payload(self, payload: dict) -> bool:
         """验证术语表 payload 是否符合 API 要求"""
@@ -0,0 +1,50 @@
+# backend/services/http_client.py
+# 进程级共享的 DeepL HTTP 客户端
+import os
+import logging
+from typing import Optional
+import httpx
+
+logger = logging.getLogger(__name__)
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _build_client() -> httpx.AsyncClient:
+    """根据环境变量创建带连接池的客户端"""
+    limits = httpx.Limits(
+        max_connections=int(os.getenv("DEEPL_HTTP_MAX_CONNECTIONS", 50)),
+        max_keepalive_connections=int(os.getenv("DEEPL_HTTP_MAX_KEEPALIVE", 20)),
+        keepalive_expiry=float(os.getenv("DEEPL_HTTP_KEEPALIVE_EXPIRY", 60))
+    )
+    timeout = httpx.Timeout(
+        float(os.getenv("DEEPL_HTTP_TIMEOUT", 30)),
+        connect=float(os.getenv("DEEPL_HTTP_CONNECT_TIMEOUT", 10))
+    )
+    http2 = os.getenv("DEEPL_HTTP2", "true").lower() == "true"
+    return httpx.AsyncClient(http2=http2, limits=limits, timeout=timeout)
+
+
+async def init_http_client() -> httpx.AsyncClient:
+    """在应用启动时创建共享客户端"""
+    global _client
+    if _client is None:
+        _client = _build_client()
+        logger.info("Shared DeepL HTTP client initialized")
+    return _client
+
+
+async def close_http_client() -> None:
+    """在应用关闭时释放连接池"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+        logger.info("Shared DeepL HTTP client closed")
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """获取共享客户端（也可作为 FastAPI 依赖项使用）"""
+    if _client is None:
+        raise RuntimeError("HTTP client not initialized")
+    return _client
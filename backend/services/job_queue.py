@@ -0,0 +1,351 @@
+# backend/services/job_queue.py
+# 后台任务队列：有界队列 + 分阶段并发限制
+import os
+import time
+import uuid
+import asyncio
+import logging
+import functools
+import traceback
+from enum import Enum
+from dataclasses import dataclass, field
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    PROCESSING_DOCUMENT = "processing_document"
+    EXTRACTING_TERMS = "extracting_terms"
+    CREATING_GLOSSARY = "creating_glossary"
+    UPLOADING = "uploading"
+    SUBMITTED = "submitted"
+    ERROR = "error"
+
+
+# 需要限制并发的阶段
+LIMITED_STAGES = (
+    JobStatus.PROCESSING_DOCUMENT,
+    JobStatus.EXTRACTING_TERMS,
+    JobStatus.CREATING_GLOSSARY,
+    JobStatus.UPLOADING,
+)
+
+
+class QueueFullError(Exception):
+    """任务队列已满"""
+    pass
+
+
+class JobError(Exception):
+    """带错误代码的任务失败异常"""
+    def __init__(self, code: str, message: str):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+@dataclass
+class Job:
+    job_id: str
+    status: JobStatus = JobStatus.QUEUED
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+    result: Optional[dict] = None
+    error: Optional[dict] = None
+    dedup_keys: List[str] = field(default_factory=list)
+    # 可供重复提交复用的中间结果（术语表 ID、文本长度等），在上传 DeepL 之前写入
+    shared: Optional[dict] = None
+    # 当前阶段的进度：processed / total / unit / eta_seconds，阶段切换时清空
+    progress: Optional[dict] = None
+    stage_started_at: float = field(default_factory=time.time)
+    # 已结束阶段的耗时（秒），便于定位慢阶段
+    stage_durations: Dict[str, float] = field(default_factory=dict)
+    # 两次进度推送的最小间隔（秒）；状态变化总是立即推送
+    progress_interval: float = 0.5
+    _last_progress_at: float = field(default=0.0, repr=False)
+    _changed: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (JobStatus.SUBMITTED, JobStatus.ERROR)
+
+    def set_status(self, status: JobStatus):
+        now = time.time()
+        self.stage_durations[self.status.value] = self.stage_durations.get(self.status.value, 0.0) + now - self.stage_started_at
+        self.status = status
+        self.stage_started_at = now
+        self.updated_at = now
+        self.progress = None
+        self._notify()
+
+    def report_progress(self, processed: int, total: Optional[int] = None, unit: str = "items"):
+        """报告当前阶段的进度；按本阶段的平均速度估算剩余时间，推送频率不超过 progress_interval"""
+        now = time.time()
+        eta = None
+        elapsed = now - self.stage_started_at
+        if total and 0 < processed < total and elapsed > 0:
+            eta = round((total - processed) * elapsed / processed, 1)
+        elif total and processed >= total:
+            eta = 0.0
+        self.progress = {"processed": processed, "total": total, "unit": unit, "eta_seconds": eta}
+        self.updated_at = now
+        if now - self._last_progress_at >= self.progress_interval or (total and processed >= total):
+            self._last_progress_at = now
+            self._notify()
+
+    def share(self, data: dict):
+        """发布可复用的中间结果，唤醒等待中的重复提交"""
+        self.shared = data
+        self._notify()
+
+    def _notify(self):
+        """唤醒所有等待中的订阅者，之后的订阅者等待新的事件"""
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def to_dict(self) -> dict:
+        data = {
+            "job_id": self.job_id,
+            "status": self.status.value,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "progress": self.progress,
+            "stage_elapsed": None if self.finished else round(time.time() - self.stage_started_at, 1),
+            "stage_durations": {stage: round(seconds, 3) for stage, seconds in self.stage_durations.items()}
+        }
+        if self.result is not None:
+            data.update(self.result)
+        if self.error is not None:
+            data["error"] = self.error
+        return data
+
+
+JobHandler = Callable[..., Awaitable[dict]]
+
+
+class JobQueue:
+    """有界任务队列，固定数量的 worker 按阶段执行任务"""
+
+    def __init__(
+        self,
+        workers: int = 4,
+        max_queue_size: int = 100,
+        stage_limits: Optional[Dict[JobStatus, int]] = None,
+        job_ttl: float = 3600,
+        dedup_ttl: float = 1800,
+        progress_interval: float = 0.5
+    ):
+        self.workers = workers
+        self.max_queue_size = max_queue_size
+        self.job_ttl = job_ttl
+        self.dedup_ttl = dedup_ttl
+        self.progress_interval = progress_interval
+        # 已完成任务各阶段的累计 (次数, 耗时秒数)
+        self.stage_totals: Dict[str, List[float]] = {}
+        stage_limits = stage_limits or {}
+        self.stage_semaphores = {
+            stage: asyncio.Semaphore(stage_limits.get(stage, workers))
+            for stage in LIMITED_STAGES
+        }
+        self.jobs: Dict[str, Job] = {}
+        # 去重键 -> 任务 ID
+        self._dedup_index: Dict[str, str] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        # 等待其他任务中间结果、尚未入队的任务
+        self._waiting: Set[asyncio.Task] = set()
+
+    @classmethod
+    def from_env(cls) -> "JobQueue":
+        """从环境变量读取队列配置"""
+        workers = int(os.getenv("JOB_WORKERS", 4))
+        stage_limits = {
+            JobStatus.PROCESSING_DOCUMENT: int(os.getenv("JOB_LIMIT_PROCESSING", workers)),
+            JobStatus.EXTRACTING_TERMS: int(os.getenv("JOB_LIMIT_TERM_EXTRACTION", 2)),
+            JobStatus.CREATING_GLOSSARY: int(os.getenv("JOB_LIMIT_GLOSSARY", 1)),
+            JobStatus.UPLOADING: int(os.getenv("JOB_LIMIT_UPLOAD", workers)),
+        }
+        return cls(
+            workers=workers,
+            max_queue_size=int(os.getenv("JOB_QUEUE_SIZE", 100)),
+            stage_limits=stage_limits,
+            job_ttl=float(os.getenv("JOB_TTL", 3600)),
+            dedup_ttl=float(os.getenv("JOB_DEDUP_TTL", 1800)),
+            progress_interval=float(os.getenv("JOB_PROGRESS_INTERVAL", 0.5))
+        )
+
+    async def start(self):
+        """启动 worker"""
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._tasks = [
+            asyncio.create_task(self._worker(i)) for i in range(self.workers)
+        ]
+        logger.info(f"Job queue started with {self.workers} workers")
+
+    async def stop(self):
+        """停止所有 worker"""
+        tasks = self._tasks + list(self._waiting)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = []
+        self._waiting.clear()
+        logger.info("Job queue stopped")
+
+    def submit(
+        self,
+        handler: JobHandler,
+        *args: Any,
+        dedup_key: Optional[str] = None,
+        after: Optional[Job] = None,
+        cleanup: Optional[Callable[[], None]] = None
+    ) -> Job:
+        """提交任务，队列已满时抛出 QueueFullError
+
+        after 不为 None 时，任务先等待 after 发布中间结果（或结束）再入队，等待期间不占用 worker，
+        但占用队列容量。等待中被取消（如服务停止）时任务置为失败，并调用 cleanup 释放 args 中的资源。
+        """
+        if self._queue is None:
+            raise RuntimeError("Job queue not started")
+        self._prune()
+        # 等待中的任务之后必定入队，与已入队的任务一起计入容量，保证入队时不会阻塞
+        if self._queue.qsize() + len(self._waiting) >= self.max_queue_size:
+            raise QueueFullError("Too many pending jobs, please retry later")
+        job = Job(job_id=str(uuid.uuid4()), progress_interval=self.progress_interval)
+        if after is not None:
+            task = asyncio.create_task(self._enqueue_after(after, job, handler, args))
+            self._waiting.add(task)
+            task.add_done_callback(functools.partial(self._waiter_done, job, cleanup))
+        else:
+            self._queue.put_nowait((job, handler, args))
+        self.jobs[job.job_id] = job
+        if dedup_key:
+            self.register_dedup_key(job, dedup_key)
+        return job
+
+    async def _enqueue_after(self, leader: Job, job: Job, handler: JobHandler, args: tuple):
+        await self.wait_shared(leader)
+        self._queue.put_nowait((job, handler, args))
+
+    def _waiter_done(self, job: Job, cleanup: Optional[Callable[[], None]], task: asyncio.Task):
+        """等待中的任务结束：未能入队（被取消）时任务置为失败并释放资源"""
+        self._waiting.discard(task)
+        if not task.cancelled() and task.exception() is None:
+            return
+        job.error = {"code": "JOB_CANCELLED", "message": "Job was cancelled before it started"}
+        job.set_status(JobStatus.ERROR)
+        if cleanup is not None:
+            cleanup()
+
+    async def wait_shared(self, job: Job) -> Optional[dict]:
+        """等待任务发布中间结果；任务未发布就结束（失败）时返回 None"""
+        async for _ in self.events(job):
+            if job.shared is not None:
+                return job.shared
+        return job.shared
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+
+    def find_by_document(self, document_id: str) -> Optional[Job]:
+        """根据 DeepL document_id 查找对应的任务"""
+        for job in self.jobs.values():
+            if job.result and job.result.get("document_id") == document_id:
+                return job
+        return None
+
+    def find_duplicate(self, dedup_key: str) -> Optional[Job]:
+        """查找可复用中间结果的任务：正在执行的任务，或最近成功完成的任务"""
+        job_id = self._dedup_index.get(dedup_key)
+        job = self.jobs.get(job_id) if job_id else None
+        if job is None:
+            return None
+        if not job.finished:
+            return job
+        if job.status == JobStatus.SUBMITTED and time.time() - job.updated_at < self.dedup_ttl:
+            return job
+        return None
+
+    def register_dedup_key(self, job: Job, dedup_key: str):
+        """为任务登记去重键（一个任务可以有多个键）"""
+        self._dedup_index[dedup_key] = job.job_id
+        job.dedup_keys.append(dedup_key)
+
+    async def events(self, job: Job, heartbeat: float = 15.0) -> AsyncIterator[Optional[dict]]:
+        """订阅任务状态和进度：先输出当前快照，之后每次变化输出最新快照，任务结束后停止
+
+        中间的进度更新可能被合并，订阅者总是拿到最新状态；heartbeat 秒内没有变化时输出 None，
+        调用方可据此发送保活消息。
+        """
+        changed = job._changed
+        yield job.to_dict()
+        while not job.finished:
+            try:
+                await asyncio.wait_for(changed.wait(), heartbeat)
+            except asyncio.TimeoutError:
+                yield None
+                continue
+            changed = job._changed
+            yield job.to_dict()
+
+    def stage_stats(self) -> Dict[str, dict]:
+        """各阶段的平均耗时"""
+        return {
+            stage: {"jobs": int(count), "avg_seconds": round(seconds / count, 3)}
+            for stage, (count, seconds) in self.stage_totals.items()
+        }
+
+    def _record_stages(self, job: Job):
+        for stage, seconds in job.stage_durations.items():
+            totals = self.stage_totals.setdefault(stage, [0, 0.0])
+            totals[0] += 1
+            totals[1] += seconds
+
+    @asynccontextmanager
+    async def stage(self, job: Job, status: JobStatus):
+        """进入某个阶段：受该阶段并发上限约束"""
+        semaphore = self.stage_semaphores.get(status)
+        if semaphore is None:
+            job.set_status(status)
+            yield
+            return
+        async with semaphore:
+            job.set_status(status)
+            yield
+
+    async def _worker(self, index: int):
+        while True:
+            job, handler, args = await self._queue.get()
+            try:
+                job.result = await handler(job, *args)
+                job.set_status(JobStatus.SUBMITTED)
+            except asyncio.CancelledError:
+                raise
+            except JobError as e:
+                logger.error(f"Job {job.job_id} failed: {e.message}")
+                job.error = {"code": e.code, "message": e.message}
+                job.set_status(JobStatus.ERROR)
+            except Exception as e:
+                logger.error(f"Job {job.job_id} failed: {str(e)}")
+                logger.error(traceback.format_exc())
+                job.error = {"code": "UNEXPECTED_ERROR", "message": "An unexpected error occurred"}
+                job.set_status(JobStatus.ERROR)
+            finally:
+                self._record_stages(job)
+                self._queue.task_done()
+
+    def _prune(self):
+        """清理过期的已完成任务"""
+        cutoff = time.time() - self.job_ttl
+        expired = [
+            job_id for job_id, job in self.jobs.items()
+            if job.finished and job.updated_at < cutoff
+        ]
+        for job_id in expired:
+            job = self.jobs.pop(job_id)
+            for key in job.dedup_keys:
+                if self._dedup_index.get(key) == job_id:
+                    del self._dedup_index[key]
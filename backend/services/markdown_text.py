@@ -0,0 +1,167 @@
+# backend/services/markdown_text.py
+# Markdown 转纯文本：逐行去除标记，不经过 HTML 渲染和再解析
+import re
+import html
+from typing import Iterable, Iterator, List, Optional
+
+# 含原始 HTML 块或注释的文档交给 markdown + BeautifulSoup 处理
+_HTML_BLOCK = re.compile(r'^ {0,3}<(?:[A-Za-z][A-Za-z0-9-]*[\s/>]|[A-Za-z][A-Za-z0-9-]*$|!--)', re.MULTILINE)
+
+# 块级语法
+_FENCE = re.compile(r'^ {0,3}(`{3,}|~{3,})')
+_ATX_HEADING = re.compile(r'^ {0,3}#{1,6}(?:\s+(.*?))?(?:\s+#+)?\s*$')
+_SETEXT_UNDERLINE = re.compile(r'^ {0,3}(?:=+|-+)\s*$')
+_THEMATIC_BREAK = re.compile(r'^ {0,3}([-*_])(?:\s*\1){2,}\s*$')
+_REFERENCE_DEFINITION = re.compile(r'^ {0,3}\[[^\]]+\]:\s*\S+')
+_BLOCKQUOTE = re.compile(r'^\s{0,3}>\s?')
+_LIST_MARKER = re.compile(r'^\s*(?:[-*+]|\d{1,9}[.)])\s+(?:\[[ xX]\]\s+)?')
+_TABLE_SEPARATOR = re.compile(r'^\|?\s*:?-+:?\s*(?:\|\s*:?-+:?\s*)*\|?\s*$')
+
+# 行内语法
+_CODE_SPAN = re.compile(r'(`+)(.+?)\1')
+_ESCAPE = re.compile(r'\\([\\`*_{}\[\]()#+\-.!|>~<])')
+_IMAGE = re.compile(r'!\[([^\]]*)\]\([^)]*\)')
+_LINK = re.compile(r'\[([^\]]+)\]\([^)]*\)')
+_REFERENCE_LINK = re.compile(r'\[([^\]]+)\]\[[^\]]*\]')
+_AUTOLINK = re.compile(r'<((?:https?|ftp|mailto):[^>\s]+|[^@<>\s]+@[^@<>\s]+)>')
+_INLINE_HTML = re.compile(r'</?[A-Za-z][A-Za-z0-9-]*(?:\s[^<>]*)?/?>')
+_STRONG_EMPHASIS = re.compile(r'(\*\*\*|___)(?=\S)(.+?)(?<=\S)\1')
+_STRONG = re.compile(r'(\*\*|__)(?=\S)(.+?)(?<=\S)\1')
+_EMPHASIS_STAR = re.compile(r'\*(?=\S)(.+?)(?<=\S)\*')
+_EMPHASIS_UNDERSCORE = re.compile(r'(?<![\w\\])_(?=\S)(.+?)(?<=\S)_(?!\w)')
+_STRIKETHROUGH = re.compile(r'~~(?=\S)(.+?)(?<=\S)~~')
+_PLACEHOLDER = re.compile('[\\ue000-\\uf8ff]')
+
+_PLACEHOLDER_BASE = 0xE000
+
+# 不含这些字符的行没有行内标记，可直接跳过
+_INLINE_MARKERS = re.compile(r'[`\\!\[<*_~&]')
+
+
+def needs_html_renderer(text: str) -> bool:
+    """文档包含原始 HTML 块（或与占位符冲突的私用区字符）时返回 True，此时应使用 markdown 渲染后再提取文本"""
+    return _HTML_BLOCK.search(text) is not None or _PLACEHOLDER.search(text) is not None
+
+
+def _strip_inline_markup(text: str) -> str:
+    if not _INLINE_MARKERS.search(text):
+        return text
+    protected: List[str] = []
+
+    def protect(value: str) -> str:
+        # 代码和转义字符先替换为私用区占位符，避免被后续的强调等规则改写
+        protected.append(value)
+        return chr(_PLACEHOLDER_BASE + len(protected) - 1)
+
+    text = _CODE_SPAN.sub(lambda m: protect(m.group(2).strip()), text)
+    text = _ESCAPE.sub(lambda m: protect(m.group(1)), text)
+    text = _IMAGE.sub(r'\1', text)
+    text = _LINK.sub(r'\1', text)
+    text = _REFERENCE_LINK.sub(r'\1', text)
+    text = _AUTOLINK.sub(lambda m: protect(m.group(1)), text)
+    text = _INLINE_HTML.sub('', text)
+    text = _STRONG_EMPHASIS.sub(r'\2', text)
+    text = _STRONG.sub(r'\2', text)
+    text = _EMPHASIS_STAR.sub(r'\1', text)
+    text = _EMPHASIS_UNDERSCORE.sub(r'\1', text)
+    text = _STRIKETHROUGH.sub(r'\1', text)
+    text = html.unescape(text)
+    if protected:
+        text = _PLACEHOLDER.sub(lambda m: protected[ord(m.group()) - _PLACEHOLDER_BASE], text)
+    return text
+
+
+def _table_row(line: str) -> str:
+    cells = re.split(r'(?<!\\)\|', line.strip().strip('|'))
+    return ' | '.join(_strip_inline_markup(cell.strip()) for cell in cells)
+
+
+def iter_markdown_blocks(lines: Iterable[str]) -> Iterator[str]:
+    """逐行去除 Markdown 标记，按块（段落、标题、列表、代码块、表格）生成纯文本"""
+    block: List[str] = []
+    fence: Optional[str] = None
+    code: List[str] = []
+
+    def flush() -> Optional[str]:
+        text = '\n'.join(line for line in block if line)
+        block.clear()
+        return text or None
+
+    for raw in lines:
+        line = raw.rstrip('\r\n')
+
+        if fence is not None:
+            if line.strip().startswith(fence) and not line.strip().strip(fence[0]):
+                text = '\n'.join(code).strip('\n')
+                if text.strip():
+                    yield text
+                fence = None
+            else:
+                code.append(line)
+            continue
+
+        match = _FENCE.match(line)
+        if match:
+            text = flush()
+            if text:
+                yield text
+            fence, code = match.group(1), []
+            continue
+
+        if not line.strip():
+            text = flush()
+            if text:
+                yield text
+            continue
+
+        if _REFERENCE_DEFINITION.match(line):
+            continue
+
+        # 段落后的 === / --- 是 Setext 标题下划线，标题本身已在 block 中
+        if block and _SETEXT_UNDERLINE.match(line):
+            text = flush()
+            if text:
+                yield text
+            continue
+
+        if _THEMATIC_BREAK.match(line):
+            text = flush()
+            if text:
+                yield text
+            continue
+
+        match = _ATX_HEADING.match(line)
+        if match:
+            text = flush()
+            if text:
+                yield text
+            heading = _strip_inline_markup(match.group(1) or '').strip()
+            if heading:
+                yield heading
+            continue
+
+        content = line
+        while _BLOCKQUOTE.match(content):
+            content = _BLOCKQUOTE.sub('', content, count=1)
+        content = _LIST_MARKER.sub('', content, count=1)
+        stripped = content.strip()
+        if not stripped:
+            continue
+        if stripped.startswith('|'):
+            if not _TABLE_SEPARATOR.match(stripped):
+                block.append(_table_row(stripped))
+            continue
+        block.append(_strip_inline_markup(stripped))
+
+    if fence is not None:
+        text = '\n'.join(code).strip('\n')
+        if text.strip():
+            yield text
+    text = flush()
+    if text:
+        yield text
+
+
+def markdown_to_text(text: str) -> str:
+    """把 Markdown 转为纯文本，块之间以空行分隔"""
+    return '\n\n'.join(iter_markdown_blocks(text.splitlines()))
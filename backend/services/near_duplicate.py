@@ -0,0 +1,134 @@
+# backend/services/near_duplicate.py
+# 近似重复文本块过滤：用字符 shingle 的 MinHash（bottom-k）签名估算相似度，跳过与已发送块高度相似的块
+import os
+import re
+import heapq
+import logging
+from typing import FrozenSet, List, Optional, Tuple
+from .token_estimator import TokenEstimator
+
+logger = logging.getLogger(__name__)
+
+_DIGITS = re.compile(r'\d+')
+_WHITESPACE = re.compile(r'\s+')
+
+# (签名, shingle 数量)
+Signature = Tuple[FrozenSet[int], int]
+
+
+class NearDuplicateFilter:
+    """按 Jaccard 相似度过滤文本块；签名为所有 shingle 哈希值中最小的 signature_size 个"""
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        threshold: float = 0.9,
+        shingle_size: int = 5,
+        signature_size: int = 128
+    ):
+        self.enabled = enabled
+        # 估算相似度不低于 threshold 的块视为重复
+        self.threshold = threshold
+        self.shingle_size = max(1, shingle_size)
+        self.signature_size = max(1, signature_size)
+        self.documents = 0
+        self.chunks = 0
+        self.skipped_chunks = 0
+        self.tokens_saved = 0
+
+    @classmethod
+    def from_env(cls) -> "NearDuplicateFilter":
+        return cls(
+            enabled=os.getenv("NEAR_DUPLICATE_FILTER", "true").lower() == "true",
+            threshold=float(os.getenv("NEAR_DUPLICATE_THRESHOLD", 0.9)),
+            shingle_size=int(os.getenv("NEAR_DUPLICATE_SHINGLE_SIZE", 5)),
+            signature_size=int(os.getenv("NEAR_DUPLICATE_SIGNATURE_SIZE", 128))
+        )
+
+    def signature(self, text: str) -> Signature:
+        # 数字不同（日期、编号、金额）的模板内容视为相同
+        normalized = _DIGITS.sub('#', _WHITESPACE.sub(' ', text)).casefold()
+        size = self.shingle_size
+        shingles = {normalized[i:i + size] for i in range(max(1, len(normalized) - size + 1))}
+        # 同一进程内 hash() 稳定，签名只在单个文档内比较
+        return frozenset(heapq.nsmallest(self.signature_size, map(hash, shingles))), len(shingles)
+
+    def similarity(self, a: Signature, b: Signature) -> float:
+        """用两个 bottom-k 签名估算 Jaccard 相似度"""
+        hashes_a, hashes_b = a[0], b[0]
+        if not hashes_a or not hashes_b:
+            return 1.0 if hashes_a == hashes_b else 0.0
+        union = heapq.nsmallest(self.signature_size, hashes_a | hashes_b)
+        return sum(1 for h in union if h in hashes_a and h in hashes_b) / len(union)
+
+    def session(self, language: Optional[str] = None) -> "DuplicateSession":
+        """每个文档使用一个会话，块只与同一文档中已保留的块比较"""
+        return DuplicateSession(self, TokenEstimator.for_language(language))
+
+    def _record(self, chunks: int, skipped: int, tokens_saved: int):
+        self.documents += 1
+        self.chunks += chunks
+        if skipped:
+            self.skipped_chunks += skipped
+            self.tokens_saved += tokens_saved
+            logger.info(f"Skipped {skipped}/{chunks} near-duplicate chunks (~{tokens_saved} tokens)")
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "threshold": self.threshold,
+            "documents": self.documents,
+            "chunks": self.chunks,
+            "skipped_chunks": self.skipped_chunks,
+            "tokens_saved": self.tokens_saved
+        }
+
+
+class DuplicateSession:
+    """单个文档的去重状态"""
+
+    def __init__(self, owner: NearDuplicateFilter, estimator: TokenEstimator):
+        self.owner = owner
+        self.estimator = estimator
+        self.kept: List[Signature] = []
+        self.chunks = 0
+        self.skipped_chunks = 0
+        self.input_tokens = 0
+        self.tokens_saved = 0
+
+    def _is_duplicate(self, signature: Signature) -> bool:
+        owner = self.owner
+        count = signature[1]
+        for kept in self.kept:
+            # shingle 数量相差过大时 Jaccard 不可能达到阈值，无需比较签名
+            if min(count, kept[1]) < owner.threshold * max(count, kept[1]):
+                continue
+            if owner.similarity(signature, kept) >= owner.threshold:
+                return True
+        return False
+
+    def keep(self, chunk: str, tokens: Optional[int] = None) -> bool:
+        """返回 True 表示应发送该块；tokens 为该块的估算 token 数，未提供时自行估算"""
+        if tokens is None:
+            tokens = self.estimator.count(chunk)
+        self.chunks += 1
+        self.input_tokens += tokens
+        if not self.owner.enabled:
+            return True
+        signature = self.owner.signature(chunk)
+        if self._is_duplicate(signature):
+            self.skipped_chunks += 1
+            self.tokens_saved += tokens
+            return False
+        self.kept.append(signature)
+        return True
+
+    def finish(self) -> dict:
+        """计入全局统计，返回本文档的统计"""
+        self.owner._record(self.chunks, self.skipped_chunks, self.tokens_saved)
+        return {
+            "chunks": self.chunks,
+            "skipped_chunks": self.skipped_chunks,
+            "input_tokens": self.input_tokens,
+            "tokens_saved": self.tokens_saved
+        }
@@ -0,0 +1,266 @@
+# backend/services/ooxml_extractor.py
+# OOXML 快速文本提取：直接从 zip 包中增量解析 XML，不构建 python-docx / python-pptx 对象模型
+# 输出与 DocumentProcessor 基于 python-docx 1.x / python-pptx 1.x 的结果保持一致
+import posixpath
+import zipfile
+import xml.etree.ElementTree as ET
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
+from .segment_table import LocatedSegment, PARAGRAPH, SLIDE, TABLE_ROW
+
+W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+A = '{http://schemas.openxmlformats.org/drawingml/2006/main}'
+P = '{http://schemas.openxmlformats.org/presentationml/2006/main}'
+R = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+PKG_REL = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+OFFICE_DOCUMENT_REL = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument'
+TABLE_GRAPHIC_URI = 'http://schemas.openxmlformats.org/drawingml/2006/table'
+
+W_BODY, W_P, W_R, W_T, W_TBL, W_TR, W_TC = W + 'body', W + 'p', W + 'r', W + 't', W + 'tbl', W + 'tr', W + 'tc'
+W_HYPERLINK, W_SECTPR, W_PPR, W_VAL = W + 'hyperlink', W + 'sectPr', W + 'pPr', W + 'val'
+
+Source = Union[str, BinaryIO]
+
+
+def _relationships(zf: zipfile.ZipFile, part: Optional[str]) -> Dict[str, Tuple[str, str]]:
+    """读取 part 的关系文件，返回 {rId: (类型, 包内路径)}；part 为 None 时读取包级关系"""
+    if part is None:
+        rels_path, base = '_rels/.rels', ''
+    else:
+        base, name = posixpath.split(part)
+        rels_path = posixpath.join(base, '_rels', name + '.rels')
+    try:
+        root = ET.fromstring(zf.read(rels_path))
+    except KeyError:
+        return {}
+
+    rels = {}
+    for rel in root.iter(PKG_REL + 'Relationship'):
+        if rel.get('TargetMode') == 'External':
+            continue
+        target = rel.get('Target', '')
+        path = target.lstrip('/') if target.startswith('/') else posixpath.normpath(posixpath.join(base, target))
+        rels[rel.get('Id')] = (rel.get('Type', ''), path)
+    return rels
+
+
+def _main_part(zf: zipfile.ZipFile, default: str) -> str:
+    for rel_type, path in _relationships(zf, None).values():
+        if rel_type == OFFICE_DOCUMENT_REL:
+            return path
+    return default
+
+
+# ---------------------------------------------------------------- DOCX
+
+# 与 python-docx 的 CT_R.text 相同：w:br 仅在换行类型时输出换行，分页/分栏符输出空串
+_DOCX_RUN_CHARS = {W + 'tab': '\t', W + 'ptab': '\t', W + 'cr': '\n', W + 'noBreakHyphen': '-'}
+
+
+def _docx_run_text(r: ET.Element) -> str:
+    parts = []
+    for child in r:
+        tag = child.tag
+        if tag == W_T:
+            parts.append(child.text or '')
+        elif tag == W + 'br':
+            if child.get(W + 'type', 'textWrapping') == 'textWrapping':
+                parts.append('\n')
+        elif tag in _DOCX_RUN_CHARS:
+            parts.append(_DOCX_RUN_CHARS[tag])
+    return ''.join(parts)
+
+
+def _docx_paragraph_text(p: ET.Element) -> str:
+    """段落文本：直接子级的 w:r 和 w:hyperlink 中的 w:r"""
+    parts = []
+    for child in p:
+        if child.tag == W_R:
+            parts.append(_docx_run_text(child))
+        elif child.tag == W_HYPERLINK:
+            parts.extend(_docx_run_text(r) for r in child if r.tag == W_R)
+    return ''.join(parts)
+
+
+def _docx_cell_text(tc: ET.Element) -> str:
+    return '\n'.join(_docx_paragraph_text(p) for p in tc if p.tag == W_P)
+
+
+def _int_attr(element: Optional[ET.Element], default: int) -> int:
+    if element is None:
+        return default
+    try:
+        return int(element.get(W_VAL))
+    except (TypeError, ValueError):
+        return default
+
+
+def _docx_table_rows(tbl: ET.Element) -> Iterator[str]:
+    """逐行生成表格文本；横向合并的单元格按跨列数重复，纵向合并的后续单元格重复首个单元格的内容"""
+    # 上一行中每个网格起始列对应的 (单元格文本, 跨列数)
+    above: Dict[int, Tuple[str, int]] = {}
+    for tr in tbl:
+        if tr.tag != W_TR:
+            continue
+        offset = _int_attr(tr.find(f'{W}trPr/{W}gridBefore'), 0)
+        current: Dict[int, Tuple[str, int]] = {}
+        cells: List[str] = []
+        for tc in tr:
+            if tc.tag != W_TC:
+                continue
+            tc_pr = tc.find(W + 'tcPr')
+            span = _int_attr(tc_pr.find(W + 'gridSpan') if tc_pr is not None else None, 1)
+            v_merge = tc_pr.find(W + 'vMerge') if tc_pr is not None else None
+            if v_merge is not None and v_merge.get(W_VAL, 'continue') == 'continue' and offset in above:
+                cell = above[offset]
+            else:
+                cell = (_docx_cell_text(tc).strip(), span)
+            current[offset] = cell
+            cells.extend([cell[0]] * cell[1])
+            offset += span
+        above = current
+        yield ' | '.join(cells)
+
+
+def iter_docx_blocks(source: Source, stats: Optional[dict] = None) -> Iterator[str]:
+    """逐段落、逐表格行生成 Word 文档文本，顺序与 python-docx 版本相同（先正文段落，后表格）
+
+    stats 不为 None 时写入 paragraphs / sections 计数。
+    """
+    for *_, text in iter_docx_located(source, stats):
+        yield text
+
+
+def iter_docx_located(source: Source, stats: Optional[dict] = None) -> Iterator[LocatedSegment]:
+    """同 iter_docx_blocks，附带段落序号或 (表格序号, 行号)"""
+    paragraphs = 0
+    sections = 0
+    tables = 0
+    table_rows: List[LocatedSegment] = []
+
+    with zipfile.ZipFile(source) as zf:
+        part = _main_part(zf, 'word/document.xml')
+        with zf.open(part) as f:
+            depth = 0
+            body = None
+            for event, elem in ET.iterparse(f, events=('start', 'end')):
+                if event == 'start':
+                    depth += 1
+                    if depth == 2 and elem.tag == W_BODY:
+                        body = elem
+                    continue
+
+                # 只处理 w:body 的直接子元素，处理完即从树中移除以限制内存
+                if depth == 3 and body is not None:
+                    if elem.tag == W_P:
+                        if elem.find(f'{W_PPR}/{W_SECTPR}') is not None:
+                            sections += 1
+                        text = _docx_paragraph_text(elem)
+                        if text.strip():
+                            yield PARAGRAPH, paragraphs, -1, text
+                        paragraphs += 1
+                    elif elem.tag == W_TBL:
+                        table_rows.extend(
+                            (TABLE_ROW, tables, index, row)
+                            for index, row in enumerate(_docx_table_rows(elem)) if row.strip()
+                        )
+                        tables += 1
+                    elif elem.tag == W_SECTPR:
+                        sections += 1
+                    body.remove(elem)
+                depth -= 1
+
+    if stats is not None:
+        stats.update({'paragraphs': paragraphs, 'sections': sections})
+    yield from table_rows
+
+
+# ---------------------------------------------------------------- PPTX
+
+def _pptx_paragraph_text(p: ET.Element) -> str:
+    """与 python-pptx 相同：a:r / a:fld 取 a:t 文本，a:br 输出垂直制表符"""
+    parts = []
+    for child in p:
+        tag = child.tag
+        if tag == A + 'r' or tag == A + 'fld':
+            t = child.find(A + 't')
+            parts.append((t.text or '') if t is not None else '')
+        elif tag == A + 'br':
+            parts.append('\v')
+    return ''.join(parts)
+
+
+def _pptx_text_body(tx_body: Optional[ET.Element]) -> str:
+    if tx_body is None:
+        return ''
+    return '\n'.join(_pptx_paragraph_text(p) for p in tx_body.findall(A + 'p'))
+
+
+def _pptx_shape_texts(shape: ET.Element) -> Iterator[str]:
+    if shape.tag == P + 'sp':
+        text = _pptx_text_body(shape.find(P + 'txBody'))
+        if text.strip():
+            yield text
+    elif shape.tag == P + 'graphicFrame':
+        graphic_data = shape.find(f'{A}graphic/{A}graphicData')
+        if graphic_data is None or graphic_data.get('uri') != TABLE_GRAPHIC_URI:
+            return
+        tbl = graphic_data.find(A + 'tbl')
+        if tbl is None:
+            return
+        table_texts = []
+        for tr in tbl.findall(A + 'tr'):
+            cell_texts = (_pptx_text_body(tc.find(A + 'txBody')).strip() for tc in tr.findall(A + 'tc'))
+            row_text = ' | '.join(text for text in cell_texts if text)
+            if row_text:
+                table_texts.append(row_text)
+        if table_texts:
+            yield '\n'.join(table_texts)
+
+
+def _pptx_slide_text(f: BinaryIO) -> str:
+    """增量解析单张幻灯片，只处理 p:spTree 的直接子形状（不展开组合形状）"""
+    slide_texts: List[str] = []
+    path: List[str] = []
+    sp_tree = None
+    for event, elem in ET.iterparse(f, events=('start', 'end')):
+        if event == 'start':
+            path.append(elem.tag)
+            if len(path) == 3 and elem.tag == P + 'spTree' and path[1] == P + 'cSld':
+                sp_tree = elem
+            continue
+        if len(path) == 4 and sp_tree is not None and path[2] == P + 'spTree':
+            slide_texts.extend(_pptx_shape_texts(elem))
+            sp_tree.remove(elem)
+        path.pop()
+    return '\n'.join(slide_texts)
+
+
+def iter_pptx_slides(source: Source, stats: Optional[dict] = None) -> Iterator[str]:
+    """按 presentation.xml 中的幻灯片顺序逐张生成文本
+
+    stats 不为 None 时写入 slides 计数。
+    """
+    for *_, text in iter_pptx_located(source, stats):
+        yield text
+
+
+def iter_pptx_located(source: Source, stats: Optional[dict] = None) -> Iterator[LocatedSegment]:
+    """同 iter_pptx_slides，附带幻灯片序号"""
+    with zipfile.ZipFile(source) as zf:
+        presentation = _main_part(zf, 'ppt/presentation.xml')
+        rels = _relationships(zf, presentation)
+        root = ET.fromstring(zf.read(presentation))
+        sld_id_lst = root.find(P + 'sldIdLst')
+        slide_parts = [
+            rels[sld_id.get(R + 'id')][1]
+            for sld_id in (sld_id_lst.findall(P + 'sldId') if sld_id_lst is not None else [])
+        ]
+        if stats is not None:
+            stats['slides'] = len(slide_parts)
+
+        for index, part in enumerate(slide_parts):
+            with zf.open(part) as f:
+                text = _pptx_slide_text(f)
+            if text:
+                yield SLIDE, index, -1, text
@@ -0,0 +1,162 @@
+# backend/services/quota_governor.py
+# DeepL 额度与速率控制：在请求到达 DeepL 之前拒绝或排队
+import os
+import time
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class QuotaExceededError(Exception):
+    """预计字符数超过 DeepL 剩余额度"""
+    pass
+
+
+class RateLimitedError(Exception):
+    """本地速率限制下等待时间过长"""
+    pass
+
+
+class TokenBucket:
+    """令牌桶：rate 为每秒补充的令牌数，capacity 为突发上限"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def acquire(self, max_wait: float):
+        """获取一个令牌，需要等待超过 max_wait 秒时抛出 RateLimitedError
+
+        在锁内预留令牌（令牌数可为负，表示排在前面的等待者），并按预留后的欠额计算等待时间；
+        锁外再睡眠，使并发调用各自按排队位置判断是否超过 max_wait。
+        """
+        async with self._lock:
+            self._refill()
+            wait = (1 - self._tokens) / self.rate if self._tokens < 1 else 0.0
+            if wait > max_wait:
+                raise RateLimitedError("Too many DeepL requests, please retry later")
+            self._tokens -= 1
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                # 放弃等待时归还预留的令牌
+                self._tokens += 1
+                raise
+
+
+class DeepLQuotaGovernor:
+    """进程级的 DeepL 额度估算与请求速率控制"""
+
+    def __init__(
+        self,
+        fetch_usage: Callable[[], Awaitable[dict]],
+        refresh_interval: float = 300,
+        safety_margin: int = 0,
+        rate: float = 10,
+        burst: float = 20,
+        max_wait: float = 5,
+        document_min_chars: int = 50000
+    ):
+        self.fetch_usage = fetch_usage
+        self.refresh_interval = refresh_interval
+        self.safety_margin = safety_margin
+        self.max_wait = max_wait
+        # DeepL 对每个文档至少按 50,000 字符计费
+        self.document_min_chars = document_min_chars
+        self.bucket = TokenBucket(rate, burst)
+        self.character_count: Optional[int] = None
+        self.character_limit: Optional[int] = None
+        self.refreshed_at: Optional[float] = None
+        # 上次刷新后本地已放行、但 DeepL 用量中可能尚未体现的字符数
+        self._consumed_since_refresh = 0
+        self.rejected = 0
+        self._task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_env(cls, fetch_usage: Callable[[], Awaitable[dict]]) -> "DeepLQuotaGovernor":
+        return cls(
+            fetch_usage,
+            refresh_interval=float(os.getenv("DEEPL_USAGE_REFRESH_INTERVAL", 300)),
+            safety_margin=int(os.getenv("DEEPL_QUOTA_SAFETY_MARGIN", 0)),
+            rate=float(os.getenv("DEEPL_RATE_LIMIT", 10)),
+            burst=float(os.getenv("DEEPL_RATE_BURST", 20)),
+            max_wait=float(os.getenv("DEEPL_RATE_MAX_WAIT", 5)),
+            document_min_chars=int(os.getenv("DEEPL_DOCUMENT_MIN_CHARS", 50000))
+        )
+
+    async def start(self):
+        """启动定期刷新用量的后台任务"""
+        self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def refresh(self):
+        """从 /v2/usage 同步当前用量"""
+        usage = await self.fetch_usage()
+        self.character_count = usage.get("character_count")
+        self.character_limit = usage.get("character_limit")
+        self.refreshed_at = time.time()
+        self._consumed_since_refresh = 0
+        logger.info(f"DeepL usage: {self.character_count}/{self.character_limit} characters")
+
+    def remaining(self) -> Optional[int]:
+        """估计剩余可用字符数，用量未知时返回 None"""
+        if self.character_count is None or not self.character_limit:
+            return None
+        return self.character_limit - self.character_count - self._consumed_since_refresh - self.safety_margin
+
+    def estimate_document_chars(self, text_length: int) -> int:
+        """估计文档翻译的计费字符数"""
+        return max(text_length, self.document_min_chars)
+
+    def check(self, chars: int):
+        """预计字符数超过剩余额度时抛出 QuotaExceededError"""
+        remaining = self.remaining()
+        if remaining is not None and chars > remaining:
+            self.rejected += 1
+            raise QuotaExceededError("Monthly character limit reached. Please contact administrator.")
+
+    async def acquire(self, chars: int):
+        """检查额度并获取速率令牌，成功后记入本地消耗"""
+        self.check(chars)
+        await self.bucket.acquire(self.max_wait)
+        self._consumed_since_refresh += chars
+
+    def mark_exhausted(self):
+        """DeepL 返回额度用尽时调用，在下次刷新前拒绝所有请求"""
+        if self.character_limit:
+            self.character_count = self.character_limit
+
+    def stats(self) -> dict:
+        return {
+            "character_count": self.character_count,
+            "character_limit": self.character_limit,
+            "estimated_remaining": self.remaining(),
+            "refreshed_at": self.refreshed_at,
+            "rejected": self.rejected
+        }
+
+    async def _refresh_loop(self):
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Failed to refresh DeepL usage: {str(e)}")
+            await asyncio.sleep(self.refresh_interval)
@@ -0,0 +1,63 @@
+# backend/services/segment_table.py
+# 文本段表：以并行数组保存每段文本及其在原文档中的位置（页、幻灯片、段落、表格行），
+# 作为提取结果在解析进程池、提取缓存和样板过滤之间传递，保留页/幻灯片边界
+from array import array
+from typing import Iterable, Iterator, List, Tuple
+
+# 段类型
+PAGE, SLIDE, PARAGRAPH, TABLE_ROW, BLOCK = range(5)
+
+# 段之间的分隔符，与 DocumentProcessor.process_file 的拼接方式一致
+SEPARATOR = '\n\n'
+
+# (类型, 位置, 子位置, 文本)：位置为页/幻灯片/段落/表格的 0 起始序号，子位置为表格行号，无则为 -1
+LocatedSegment = Tuple[int, int, int, str]
+
+
+class SegmentTable:
+    """紧凑的段表：文本、类型和位置分别存放在并行数组中"""
+
+    __slots__ = ('texts', 'kinds', 'locations', 'sub_locations', '_length')
+
+    def __init__(self):
+        self.texts: List[str] = []
+        self.kinds = array('b')
+        self.locations = array('l')
+        self.sub_locations = array('l')
+        # 拼接文本的当前长度
+        self._length = 0
+
+    @classmethod
+    def from_located(cls, segments: Iterable[LocatedSegment]) -> "SegmentTable":
+        table = cls()
+        table.extend(segments)
+        return table
+
+    def append(self, text: str, kind: int, location: int, sub_location: int = -1):
+        if self.texts:
+            self._length += len(SEPARATOR)
+        self.texts.append(text)
+        self.kinds.append(kind)
+        self.locations.append(location)
+        self.sub_locations.append(sub_location)
+        self._length += len(text)
+
+    def extend(self, segments: Iterable[LocatedSegment]):
+        for kind, location, sub_location, text in segments:
+            self.append(text, kind, location, sub_location)
+
+    def located(self) -> Iterator[LocatedSegment]:
+        """逐段返回 (类型, 位置, 子位置, 文本)"""
+        return zip(self.kinds, self.locations, self.sub_locations, self.texts)
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    @property
+    def text(self) -> str:
+        """拼接后的全文，与 process_file 的结果一致"""
+        return SEPARATOR.join(self.texts)
+
+    @property
+    def text_length(self) -> int:
+        return self._length
@@ -0,0 +1,51 @@
+# backend/services/sentence_segmenter.py
+# 句子切分：一次正则扫描同时识别句末标点、段落和列表项边界，返回原文中的 (start, end) 偏移而不复制文本
+import re
+from typing import Dict, List, Tuple
+
+Span = Tuple[int, int]
+
+_LEADING_SPACE = re.compile(r'\s*')
+_TRAILING_SPACE = re.compile(r'\s*\Z')
+
+
+def _rstrip_end(text: str, end: int) -> int:
+    while end > 0 and text[end - 1].isspace():
+        end -= 1
+    return end
+
+
+class SentenceSegmenter:
+    """
+    按 DocumentChunker.sentence_patterns 预编译的句子切分器
+    general 为句末标点（句子包含标点本身），section 为段落分隔，list 为列表项前的换行；
+    三者合并为一个正则，各分支以单个字符或字符集开头，便于正则引擎快速定位
+    """
+
+    def __init__(self, patterns: Dict[str, str]):
+        # 边界之后的空白一并匹配，下一句的起点即为非空白字符
+        self._boundary = re.compile(
+            f"(?:({patterns['general']})|{patterns['section']}|{patterns['list']})\\s*"
+        )
+
+    def spans(self, text: str) -> List[Span]:
+        """返回各句的 (start, end)，已去除首尾空白，不含空句"""
+        starts = [_LEADING_SPACE.match(text).end()]
+        ends = []
+        for match in self._boundary.finditer(text):
+            # 句末标点属于本句；换行边界处去掉本句末尾的空白
+            ends.append(match.end(1) if match.lastindex else _rstrip_end(text, match.start()))
+            starts.append(match.end())
+        ends.append(_TRAILING_SPACE.search(text, starts[-1]).start())
+        return [(start, end) for start, end in zip(starts, ends) if start < end]
+
+    def split(self, text: str) -> List[str]:
+        """与 [text[start:end] for start, end in spans(text)] 相同，直接用 re.split 生成字符串，不创建匹配对象"""
+        # 捕获组使结果交替为 [句子主体, 句末标点或 None, 句子主体, ...]
+        pieces = self._boundary.split(text)
+        pieces[0] = pieces[0].lstrip()
+        bodies = pieces[0::2]
+        marks = pieces[1::2]
+        marks.append(None)
+        sentences = [body + mark if mark else body.rstrip() for body, mark in zip(bodies, marks)]
+        return [sentence for sentence in sentences if sentence]
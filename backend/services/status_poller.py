@@ -0,0 +1,199 @@
+# backend/services/status_poller.py
+# 文档翻译状态推送：每个文档只有一个上游轮询任务，多个订阅者共享结果
+import os
+import json
+import time
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# DeepL 文档的终止状态
+FINAL_STATUSES = {"done", "error"}
+
+StatusFetcher = Callable[[str, str], Awaitable[dict]]
+
+
+@dataclass
+class _Poller:
+    document_key: str
+    task: Optional[asyncio.Task] = None
+    subscribers: Set[asyncio.Queue] = field(default_factory=set)
+    latest: Optional[dict] = None
+    latest_at: float = 0.0
+
+
+class DocumentStatusHub:
+    """按文档聚合状态轮询，并根据 seconds_remaining 自适应调整轮询间隔"""
+
+    def __init__(
+        self,
+        fetch_status: StatusFetcher,
+        min_interval: float = 1.0,
+        max_interval: float = 30.0,
+        max_failures: int = 5,
+        heartbeat: float = 15.0,
+        final_ttl: float = 600.0
+    ):
+        self.fetch_status = fetch_status
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.max_failures = max_failures
+        # 订阅期间 heartbeat 秒内没有新状态时输出 None，调用方据此发送保活消息
+        self.heartbeat = heartbeat
+        # 终止状态保留 final_ttl 秒，之后的订阅直接返回，不再轮询上游
+        self.final_ttl = final_ttl
+        self._pollers: Dict[str, _Poller] = {}
+        # document_id -> (document_key, 终止状态, 记录时间)
+        self._finished: Dict[str, Tuple[str, dict, float]] = {}
+        self.upstream_requests = 0
+
+    @classmethod
+    def from_env(cls, fetch_status: StatusFetcher) -> "DocumentStatusHub":
+        return cls(
+            fetch_status,
+            min_interval=float(os.getenv("STATUS_POLL_MIN_INTERVAL", 1.0)),
+            max_interval=float(os.getenv("STATUS_POLL_MAX_INTERVAL", 30.0)),
+            heartbeat=float(os.getenv("STATUS_EVENTS_HEARTBEAT", 15.0)),
+            final_ttl=float(os.getenv("STATUS_FINAL_TTL", 600.0))
+        )
+
+    def latest(self, document_id: str, document_key: str, max_age: float) -> Optional[dict]:
+        """返回轮询任务最近拿到的状态（不超过 max_age 秒），已结束的文档返回终止状态"""
+        final = self._final_status(document_id)
+        if final and final[0] == document_key:
+            return final[1]
+        poller = self._pollers.get(document_id)
+        if poller and poller.document_key == document_key and poller.latest:
+            if time.time() - poller.latest_at <= max_age:
+                return poller.latest
+        return None
+
+    def can_subscribe(self, document_id: str, document_key: str) -> bool:
+        """已有轮询任务或终止状态时，订阅者必须提供相同的 document_key"""
+        final = self._final_status(document_id)
+        if final:
+            return final[0] == document_key
+        poller = self._pollers.get(document_id)
+        return poller is None or poller.document_key == document_key
+
+    async def stream(self, document_id: str, document_key: str) -> AsyncIterator[Optional[dict]]:
+        """订阅文档状态，直到进入终止状态；heartbeat 秒内没有新状态时输出 None"""
+        final = self._final_status(document_id)
+        if final:
+            if final[0] != document_key:
+                raise PermissionError("Invalid document key")
+            # 已结束的文档直接返回缓存的终止状态，不再启动上游轮询
+            yield final[1]
+            return
+
+        poller = self._pollers.get(document_id)
+        if poller is None:
+            poller = _Poller(document_key=document_key)
+            self._pollers[document_id] = poller
+        elif poller.document_key != document_key:
+            raise PermissionError("Invalid document key")
+
+        queue: asyncio.Queue = asyncio.Queue()
+        poller.subscribers.add(queue)
+        if poller.latest:
+            queue.put_nowait(poller.latest)
+        if poller.task is None or poller.task.done():
+            poller.task = asyncio.create_task(self._poll(document_id, poller))
+
+        try:
+            while True:
+                try:
+                    status = await asyncio.wait_for(queue.get(), self.heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                yield status
+                if status.get("status") in FINAL_STATUSES:
+                    break
+        finally:
+            poller.subscribers.discard(queue)
+            if not poller.subscribers and self._pollers.get(document_id) is poller:
+                # 没有订阅者时停止上游轮询
+                if poller.task and not poller.task.done():
+                    poller.task.cancel()
+                del self._pollers[document_id]
+
+    async def close(self):
+        """关闭所有轮询任务"""
+        for poller in self._pollers.values():
+            if poller.task and not poller.task.done():
+                poller.task.cancel()
+        self._pollers.clear()
+        self._finished.clear()
+
+    def _final_status(self, document_id: str) -> Optional[Tuple[str, dict, float]]:
+        entry = self._finished.get(document_id)
+        if entry and time.time() - entry[2] > self.final_ttl:
+            del self._finished[document_id]
+            return None
+        return entry
+
+    def _remember_final(self, document_id: str, document_key: str, status: dict):
+        now = time.time()
+        expired = [key for key, (_, _, at) in self._finished.items() if now - at > self.final_ttl]
+        for key in expired:
+            del self._finished[key]
+        self._finished[document_id] = (document_key, status, now)
+
+    def _next_interval(self, status: dict, previous: float) -> float:
+        """有剩余时间估计时按估计值等待，否则指数退避"""
+        seconds_remaining = status.get("seconds_remaining")
+        if isinstance(seconds_remaining, (int, float)) and seconds_remaining > 0:
+            interval = float(seconds_remaining)
+        else:
+            interval = previous * 2
+        return max(self.min_interval, min(interval, self.max_interval))
+
+    def _publish(self, poller: _Poller, status: dict):
+        poller.latest = status
+        poller.latest_at = time.time()
+        for queue in poller.subscribers:
+            queue.put_nowait(status)
+
+    async def _poll(self, document_id: str, poller: _Poller):
+        interval = self.min_interval
+        failures = 0
+        while True:
+            try:
+                self.upstream_requests += 1
+                status = await self.fetch_status(document_id, poller.document_key)
+                failures = 0
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                failures += 1
+                logger.warning(f"Status poll failed for {document_id} ({failures}/{self.max_failures}): {str(e)}")
+                if failures >= self.max_failures:
+                    # 轮询失败不是文档的终止状态，不缓存，之后的订阅可以重试
+                    self._publish(poller, {"status": "error", "message": str(e)})
+                    return
+                interval = min(interval * 2, self.max_interval)
+                await asyncio.sleep(interval)
+                continue
+
+            if status != poller.latest:
+                self._publish(poller, status)
+            else:
+                poller.latest_at = time.time()
+            if status.get("status") in FINAL_STATUSES:
+                self._remember_final(document_id, poller.document_key, status)
+                return
+
+            interval = self._next_interval(status, interval)
+            await asyncio.sleep(interval)
+
+
+def format_sse(data: dict, event: Optional[str] = None) -> str:
+    """格式化为 Server-Sent Events 消息"""
+    message = f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+    if event:
+        message = f"event: {event}\n" + message
+    return message
@@ -1,12 +1,11 @@
 # backend/services/term_extractor.py 
 # 术语提取器
-import google.generativeai as genai
-from typing import List, Tuple, Set, Dict, Any
+from typing import List, Tuple, Set, Dict, Any, AsyncIterable, Callable, Optional
 import os
 import json
 from .document_chunker import DocumentChunker
+from .near_duplicate import NearDuplicateFilter
 import logging
-from google.generativeai.types import HarmCategory, HarmBlockThreshold
 from tenacity import retry, stop_after_attempt, wait_exponential
 import traceback
 import asyncio
@@ -15,6 +14,9 @@ import re
 # 添加 logger 配置
 logger = logging.getLogger(__name__)
 
+# 进度回调：(已处理块数, 总块数；流式提取时为 None)
+ChunkProgress = Callable[[int, Optional[int]], None]
+
 class TermExtractorConfig:
     """术语提取器配置管理"""
     def __init__(self):
@@ -99,7 +101,10 @@ class TermExtractorConfig:
         )
 
 class GeminiTermExtractor:
-    def __init__(self):
+    def __init__(self, duplicate_filter: Optional[NearDuplicateFilter] = None):
+        # google.generativeai 导入开销大，只在真正需要提取术语时导入
+        import google.generativeai as genai
+
         genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
         self.generation_config = {
             "temperature": 0.7,  # 提高温度增加创造性
@@ -111,11 +116,25 @@ class GeminiTermExtractor:
             model_name='gemini-1.5-pro',
             generation_config=self.generation_config
         )
-        self.chunker = DocumentChunker()
+        # CHUNK_MODE=tokens 时按 token 预算分块，预留 max_output_tokens 给输出
+        self.chunker = DocumentChunker.from_env(output_tokens=self.generation_config["max_output_tokens"])
         self.config = TermExtractorConfig()
+        # 近似重复块过滤，未传入时不过滤
+        self.duplicate_filter = duplicate_filter or NearDuplicateFilter(enabled=False)
 
-    async def extract_terms(self, text: str, source_lang: str, target_lang: str) -> List[Tuple[str, str]]:
-        """提取术语的主方法"""
+    async def extract_terms(
+        self,
+        text: str,
+        source_lang: str,
+        target_lang: str,
+        stats: Optional[dict] = None,
+        progress: Optional[ChunkProgress] = None
+    ) -> List[Tuple[str, str]]:
+        """提取术语的主方法
+
+        stats 不为 None 时写入分块统计（块数、跳过的近似重复块数、估算 token 数）；
+        progress 在每个块处理完后调用。
+        """
         try:
             # 统一转换为小写
             source_lang = source_lang.lower()
@@ -128,14 +147,27 @@ class GeminiTermExtractor:
             processed_text = text.replace('\t', ' ')
             
             # 分块处理
-            chunks = self.chunker.create_chunks(processed_text)
-            logger.info(f"Created {len(chunks)} text chunks")
+            plan = self.chunker.plan_chunks(processed_text, language=source_lang)
+            chunks = plan.chunks
+            logger.info(
+                f"Created {plan.calls} text chunks, ~{plan.input_tokens} input tokens, "
+                f"~{plan.total_tokens} tokens including output"
+            )
             
             all_terms = set()
+            duplicates = self.duplicate_filter.session(source_lang)
             for i, chunk in enumerate(chunks, 1):
-                logger.debug(f"Processing chunk {i}/{len(chunks)}")
-                terms = await self._extract_ai_terms(chunk, source_lang, target_lang)
-                all_terms.update(terms)
+                if duplicates.keep(chunk, plan.tokens[i - 1]):
+                    logger.debug(f"Processing chunk {i}/{len(chunks)} (~{plan.tokens[i - 1]} tokens)")
+                    terms = await self._extract_ai_terms(chunk, source_lang, target_lang)
+                    all_terms.update(terms)
+                else:
+                    logger.debug(f"Skipping near-duplicate chunk {i}/{len(chunks)}")
+                if progress is not None:
+                    progress(i, len(chunks))
+            chunk_stats = duplicates.finish()
+            if stats is not None:
+                stats.update(chunk_stats)
             
             # 转换为列表并返回 - 几乎不做任何过滤
             validated_terms = [(s, t) for s, t in all_terms if s and t]
@@ -147,6 +179,58 @@ class GeminiTermExtractor:
             logger.error(f"Term extraction failed: {str(e)}\n{traceback.format_exc()}")
             return []
 
+    async def extract_terms_from_stream(
+        self,
+        segments: AsyncIterable[str],
+        source_lang: str,
+        target_lang: str,
+        stats: Optional[dict] = None,
+        progress: Optional[ChunkProgress] = None
+    ) -> List[Tuple[str, str]]:
+        """边解析边提取术语：每凑满一个文本块就调用一次 Gemini，不必等待整个文档解析完成
+
+        stats、progress 同 extract_terms（总块数未知，progress 的第二个参数为 None）。
+        """
+        try:
+            source_lang = source_lang.lower()
+            target_lang = target_lang.lower()
+            logger.info(f"Starting streaming term extraction for {source_lang}->{target_lang}")
+
+            async def processed_segments():
+                async for segment in segments:
+                    yield segment.replace('\t', ' ')
+
+            all_terms = set()
+            chunk_count = 0
+            input_tokens = 0
+            duplicates = self.duplicate_filter.session(source_lang)
+            async for chunk in self.chunker.acreate_chunks_from_stream(processed_segments(), language=source_lang):
+                chunk_count += 1
+                chunk_tokens = self.chunker.estimate_tokens(chunk, source_lang)
+                if duplicates.keep(chunk, chunk_tokens):
+                    input_tokens += chunk_tokens
+                    logger.debug(f"Processing streamed chunk {chunk_count} (~{chunk_tokens} tokens)")
+                    terms = await self._extract_ai_terms(chunk, source_lang, target_lang)
+                    all_terms.update(terms)
+                else:
+                    logger.debug(f"Skipping near-duplicate streamed chunk {chunk_count}")
+                if progress is not None:
+                    progress(chunk_count, None)
+            chunk_stats = duplicates.finish()
+            if stats is not None:
+                stats.update(chunk_stats)
+
+            validated_terms = [(s, t) for s, t in all_terms if s and t]
+            logger.info(
+                f"Extracted {len(validated_terms)} terms from {chunk_count} streamed chunks "
+                f"(~{input_tokens} input tokens sent)"
+            )
+            return validated_terms
+
+        except Exception as e:
+            logger.error(f"Streaming term extraction failed: {str(e)}\n{traceback.format_exc()}")
+            return []
+
     def _process_text(self, text: str) -> str:
         """文本预处理 - 极简版本，保留原始文本结构"""
         try:
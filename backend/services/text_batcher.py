@@ -0,0 +1,128 @@
+# backend/services/text_batcher.py
+# 文本翻译微批处理：合并同一语言对的并发请求为一次 DeepL 调用
+import os
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# DeepL /v2/translate 单次请求最多 50 条文本，请求体不超过 128 KiB
+MAX_TEXTS_PER_REQUEST = 50
+MAX_REQUEST_BYTES = 128 * 1024
+
+BatchTranslator = Callable[[List[str], str, Optional[str]], Awaitable[List[dict]]]
+
+
+@dataclass
+class _Batch:
+    texts: List[str] = field(default_factory=list)
+    futures: List[asyncio.Future] = field(default_factory=list)
+    size_bytes: int = 0
+    timer: Optional[asyncio.TimerHandle] = None
+
+
+class TextBatcher:
+    """在很短的时间窗口内收集单条翻译请求，合并后发送并把结果分发回各调用方"""
+
+    def __init__(
+        self,
+        translate_batch: BatchTranslator,
+        window: float = 0.005,
+        max_batch_size: int = MAX_TEXTS_PER_REQUEST,
+        max_batch_bytes: int = MAX_REQUEST_BYTES - 4096  # 预留 JSON 结构和参数的空间
+    ):
+        self.translate_batch = translate_batch
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self.max_batch_bytes = max_batch_bytes
+        self._pending: Dict[Tuple[str, Optional[str]], _Batch] = {}
+        # 已发出的批次任务；事件循环只弱引用任务，需在此持有直到完成
+        self._sending: Set[asyncio.Task] = set()
+        self.upstream_requests = 0
+        self.batched_texts = 0
+
+    @classmethod
+    def from_env(cls, translate_batch: BatchTranslator) -> "TextBatcher":
+        return cls(
+            translate_batch,
+            window=float(os.getenv("TEXT_BATCH_WINDOW_MS", 5)) / 1000
+        )
+
+    async def translate(self, text: str, target_lang: str, source_lang: Optional[str] = None) -> dict:
+        """翻译单条文本，与同一语言对的并发请求合并发送"""
+        key = (target_lang, source_lang)
+        text_bytes = len(text.encode('utf-8'))
+        batch = self._pending.get(key)
+        if batch and batch.size_bytes + text_bytes > self.max_batch_bytes:
+            self._flush(key)
+            batch = None
+        if batch is None:
+            batch = _Batch()
+            self._pending[key] = batch
+            batch.timer = asyncio.get_running_loop().call_later(self.window, self._flush, key)
+
+        future = asyncio.get_running_loop().create_future()
+        batch.texts.append(text)
+        batch.futures.append(future)
+        batch.size_bytes += text_bytes
+        if len(batch.texts) >= self.max_batch_size:
+            self._flush(key)
+        return await future
+
+    async def translate_many(self, texts: List[str], target_lang: str, source_lang: Optional[str] = None) -> List[dict]:
+        """翻译多条文本，按 DeepL 的请求限制拆分后并发发送"""
+        batches: List[List[str]] = []
+        current: List[str] = []
+        current_bytes = 0
+        for text in texts:
+            text_bytes = len(text.encode('utf-8'))
+            if current and (len(current) >= self.max_batch_size or current_bytes + text_bytes > self.max_batch_bytes):
+                batches.append(current)
+                current, current_bytes = [], 0
+            current.append(text)
+            current_bytes += text_bytes
+        if current:
+            batches.append(current)
+
+        results = await asyncio.gather(*(self._call(batch, target_lang, source_lang) for batch in batches))
+        return [translation for batch_result in results for translation in batch_result]
+
+    async def _call(self, texts: List[str], target_lang: str, source_lang: Optional[str]) -> List[dict]:
+        self.upstream_requests += 1
+        self.batched_texts += len(texts)
+        translations = await self.translate_batch(texts, target_lang, source_lang)
+        if len(translations) != len(texts):
+            raise ValueError(f"Expected {len(texts)} translations, got {len(translations)}")
+        return translations
+
+    def _flush(self, key: Tuple[str, Optional[str]]):
+        batch = self._pending.pop(key, None)
+        if batch is None:
+            return
+        if batch.timer:
+            batch.timer.cancel()
+        task = asyncio.ensure_future(self._send(batch, *key))
+        self._sending.add(task)
+        task.add_done_callback(self._sending.discard)
+
+    async def close(self):
+        """立即发送尚在收集中的批次，并等待所有已发出的批次完成"""
+        for key in list(self._pending):
+            self._flush(key)
+        if self._sending:
+            await asyncio.gather(*self._sending, return_exceptions=True)
+
+    async def _send(self, batch: _Batch, target_lang: str, source_lang: Optional[str]):
+        try:
+            translations = await self._call(batch.texts, target_lang, source_lang)
+        except Exception as e:
+            for future in batch.futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        logger.debug(f"Sent {len(batch.texts)} batched texts for {source_lang}->{target_lang}")
+        for future, translation in zip(batch.futures, translations):
+            if not future.done():
+                future.set_result(translation)
@@ -0,0 +1,47 @@
+# backend/services/token_estimator.py
+# 本地 token 估算：按语言区分 CJK 字符和其他字符的 token 比例，不调用 Gemini count_tokens 接口
+import re
+from math import ceil
+from typing import Dict, Optional, Tuple
+
+# 中日韩文字（含假名、谚文、全角片假名），Gemini 的分词器对这些字符大致按字计 token
+_CJK = re.compile('[\\u3040-\\u30ff\\u3400-\\u4dbf\\u4e00-\\u9fff\\uac00-\\ud7af\\uf900-\\ufaff\\uff66-\\uff9f]')
+
+# 每种源语言的 (每个 CJK 字符的 token 数, 其他字符平均每个 token 的字符数)
+# 经验值，偏保守（宁可高估也不超出预算），可通过构造参数覆盖
+LANGUAGE_PROFILES: Dict[str, Tuple[float, float]] = {
+    'zh': (0.8, 3.5),
+    'ja': (1.0, 3.5),
+    'en': (0.8, 4.0),
+    'id': (0.8, 3.2),
+}
+DEFAULT_PROFILE: Tuple[float, float] = (1.0, 3.2)
+
+
+class TokenEstimator:
+    """按字符类别估算 token 数：CJK 字符按字计，其他字符（含空白）按平均字符数/token 计"""
+
+    __slots__ = ('cjk_tokens_per_char', 'chars_per_token')
+
+    def __init__(self, cjk_tokens_per_char: float = DEFAULT_PROFILE[0], chars_per_token: float = DEFAULT_PROFILE[1]):
+        self.cjk_tokens_per_char = cjk_tokens_per_char
+        self.chars_per_token = chars_per_token
+
+    @classmethod
+    def for_language(cls, language: Optional[str]) -> "TokenEstimator":
+        return cls(*LANGUAGE_PROFILES.get((language or '').lower(), DEFAULT_PROFILE))
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        cjk = _CJK.subn('', text)[1] if not text.isascii() else 0
+        return ceil(cjk * self.cjk_tokens_per_char + (len(text) - cjk) / self.chars_per_token)
+
+    __call__ = count
+
+    def max_chars(self, text: str, max_tokens: int) -> int:
+        """按 text 的字符构成，估算不超过 max_tokens 的最大字符数（用于切分超长句子）"""
+        tokens = self.count(text)
+        if tokens <= max_tokens:
+            return len(text)
+        return max(1, len(text) * max_tokens // tokens)
@@ -0,0 +1,161 @@
+# backend/services/translation_cache.py
+# 翻译记忆缓存：进程内 LRU + PostgreSQL 两级缓存
+import os
+import asyncio
+import hashlib
+import logging
+import unicodedata
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert
+from models.translation_memory import TranslationMemory
+
+logger = logging.getLogger(__name__)
+
+# 每个缓存条目的固定开销估计（键、字典和 OrderedDict 节点）
+ENTRY_OVERHEAD_BYTES = 256
+
+
+def normalize_text(text: str) -> str:
+    """规范化文本：统一 Unicode 形式并去除首尾空白"""
+    return unicodedata.normalize('NFC', text).strip()
+
+
+def make_cache_key(text: str, source_lang: Optional[str], target_lang: str, glossary_id: Optional[str] = None) -> str:
+    """根据规范化文本、语言对和术语表生成缓存键"""
+    raw = "\x1f".join([
+        normalize_text(text),
+        (source_lang or "").upper(),
+        target_lang.upper(),
+        glossary_id or ""
+    ])
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class TranslationCache:
+    """两级翻译缓存：内存 LRU 按字节数淘汰，未命中时查询数据库"""
+
+    def __init__(
+        self,
+        session_factory: Optional[Callable[[], Session]] = None,
+        max_bytes: int = 64 * 1024 * 1024
+    ):
+        self.session_factory = session_factory
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[dict, int]]" = OrderedDict()
+        self._size_bytes = 0
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_env(cls, session_factory: Callable[[], Session]) -> "TranslationCache":
+        use_db = os.getenv("TRANSLATION_CACHE_DB", "true").lower() == "true"
+        return cls(
+            session_factory=session_factory if use_db else None,
+            max_bytes=int(os.getenv("TRANSLATION_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+        )
+
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, dict]:
+        """批量查询缓存，返回命中的 {cache_key: translation}"""
+        found: Dict[str, dict] = {}
+        missing: List[str] = []
+        for key in keys:
+            if key in found:
+                continue
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                found[key] = entry[0]
+                self.memory_hits += 1
+            else:
+                missing.append(key)
+
+        if missing and self.session_factory:
+            try:
+                rows = await asyncio.to_thread(self._db_get, missing)
+            except Exception as e:
+                logger.warning(f"Translation memory lookup failed: {str(e)}")
+                rows = {}
+            for key, translation in rows.items():
+                self._remember(key, translation)
+                found[key] = translation
+            self.db_hits += len(rows)
+
+        self.misses += len([key for key in missing if key not in found])
+        return found
+
+    async def put_many(self, items: List[Tuple[str, dict, Optional[str], str, Optional[str]]]):
+        """写入缓存，items 为 (cache_key, translation, source_lang, target_lang, glossary_id)"""
+        for key, translation, *_ in items:
+            self._remember(key, translation)
+        if items and self.session_factory:
+            try:
+                await asyncio.to_thread(self._db_put, items)
+            except Exception as e:
+                logger.warning(f"Translation memory write failed: {str(e)}")
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.db_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "size_bytes": self._size_bytes,
+            "max_bytes": self.max_bytes,
+            "memory_hits": self.memory_hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": (self.memory_hits + self.db_hits) / lookups if lookups else 0.0
+        }
+
+    def _remember(self, key: str, translation: dict):
+        size = ENTRY_OVERHEAD_BYTES + len(translation.get("text", "").encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._size_bytes -= previous[1]
+        self._entries[key] = (translation, size)
+        self._size_bytes += size
+        while self._size_bytes > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._size_bytes -= evicted_size
+            self.evictions += 1
+
+    def _db_get(self, keys: List[str]) -> Dict[str, dict]:
+        db = self.session_factory()
+        try:
+            rows = db.query(TranslationMemory).filter(TranslationMemory.cache_key.in_(keys)).all()
+            return {
+                row.cache_key: {
+                    "detected_source_language": row.detected_source_language,
+                    "text": row.translated_text
+                }
+                for row in rows
+            }
+        finally:
+            db.close()
+
+    def _db_put(self, items: List[Tuple[str, dict, Optional[str], str, Optional[str]]]):
+        db = self.session_factory()
+        try:
+            values = [
+                {
+                    "cache_key": key,
+                    "source_lang": source_lang.upper() if source_lang else None,
+                    "target_lang": target_lang.upper(),
+                    "glossary_id": glossary_id,
+                    "translated_text": translation.get("text", ""),
+                    "detected_source_language": translation.get("detected_source_language")
+                }
+                for key, translation, source_lang, target_lang, glossary_id in items
+            ]
+            db.execute(insert(TranslationMemory).values(values).on_conflict_do_nothing(index_elements=["cache_key"]))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
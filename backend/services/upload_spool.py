@@ -0,0 +1,92 @@
+# backend/services/upload_spool.py
+# 上传文件落盘：只写一次磁盘，同时计算哈希和大小
+import os
+import hashlib
+import logging
+import tempfile
+from dataclasses import dataclass
+from typing import BinaryIO, Callable, Optional
+from fastapi import UploadFile
+
+logger = logging.getLogger(__name__)
+
+SPOOL_CHUNK_SIZE = 1024 * 1024  # 1MB
+
+# 进度回调：(已处理量, 总量)
+ProgressCallback = Callable[[int, int], None]
+
+
+class FileTooLargeError(Exception):
+    """上传文件超过大小限制"""
+    pass
+
+
+class ProgressReader:
+    """包装文件句柄，每次读取后按当前文件位置报告进度；其余属性（seek、tell、fileno 等）直接转发"""
+
+    def __init__(self, file: BinaryIO, total: int, progress: ProgressCallback):
+        self._file = file
+        self._total = total
+        self._progress = progress
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._file.read(size)
+        self._progress(self._file.tell(), self._total)
+        return data
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._file.close()
+
+
+@dataclass
+class SpooledUpload:
+    path: str
+    filename: str
+    size: int
+    sha256: str
+
+    def open(self, progress: Optional[ProgressCallback] = None) -> BinaryIO:
+        """以二进制方式打开落盘文件（用于流式上传）；传入 progress 时每次读取后报告已读字节数"""
+        file = open(self.path, 'rb')
+        if progress is None:
+            return file
+        return ProgressReader(file, self.size, progress)
+
+    def cleanup(self):
+        """删除落盘文件"""
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Failed to remove spooled upload {self.path}: {str(e)}")
+
+
+async def spool_upload(upload: UploadFile, max_size: int) -> SpooledUpload:
+    """分块把上传内容写入临时文件，边写边计算 SHA-256，超过 max_size 时中止"""
+    ext = os.path.splitext(upload.filename.lower())[1]
+    fd, path = tempfile.mkstemp(suffix=ext, dir=os.getenv("UPLOAD_SPOOL_DIR") or None)
+    hasher = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            while True:
+                chunk = await upload.read(SPOOL_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_size:
+                    raise FileTooLargeError("File size exceeds limit")
+                hasher.update(chunk)
+                f.write(chunk)
+    except BaseException:
+        os.unlink(path)
+        raise
+
+    return SpooledUpload(path=path, filename=upload.filename, size=size, sha256=hasher.hexdigest())
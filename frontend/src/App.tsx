@@ -26,11 +26,20 @@ export type TranslationStatus =
     'error';
 export type TranslationMode = 'text' | 'document';
 
+// 后台任务当前阶段的进度（/api/jobs/{job_id}/events 推送）
+export interface JobProgress {
+    processed: number;
+    total: number | null;
+    unit: string;
+    eta_seconds: number | null;
+}
+
 function App() {
   const { t } = useTranslation()
   const [mode, setMode] = useState<TranslationMode>('text')
   const [status, setStatus] = useState<TranslationStatus>('idle')
   const [errorMessage, setErrorMessage] = useState<string>('')
+  const [jobProgress, setJobProgress] = useState<JobProgress | null>(null)
   const [selectedFile, setSelectedFile] = useState<File | null>(null)
   const [targetLanguage, setTargetLanguage] = useState<string>(
     localStorage.getItem('targetLanguage') || 'ID'  // 默认印尼语
@@ -102,66 +111,104 @@ function App() {
             throw new Error(errorData.detail?.message || 'Upload failed');
         }
 
-        const { document_id, document_key, has_glossary } = await response.json();
+        const { job_id } = await response.json();
+        console.log('Upload accepted:', { job_id });
+
+        // 1. 通过服务端推送等待后台任务完成文档处理、术语提取和上传，同时接收各阶段进度
+        const waitForJob = () => new Promise<any>((resolve, reject) => {
+            const source = new EventSource(`${API_BASE_URL}/api/jobs/${job_id}/events`);
+            const timeoutId = setTimeout(() => {
+                source.close();
+                reject(new Error(t('error.timeout')));
+            }, 5 * 60 * 1000);
+            const finish = (error: Error | null, jobData?: any) => {
+                clearTimeout(timeoutId);
+                source.close();
+                setJobProgress(null);
+                if (error) {
+                    reject(error);
+                } else {
+                    resolve(jobData);
+                }
+            };
+
+            source.onmessage = (event) => {
+                const jobData = JSON.parse(event.data);
+                setJobProgress(jobData.progress ?? null);
+                switch(jobData.status) {
+                    case 'processing_document':
+                        setStatus('processing');
+                        break;
+                    case 'extracting_terms':
+                        setStatus('extracting');
+                        break;
+                    case 'creating_glossary':
+                        setStatus('creating_glossary');
+                        break;
+                    case 'uploading':
+                        setStatus('uploading');
+                        break;
+                    case 'submitted':
+                        finish(null, jobData);
+                        break;
+                    case 'error':
+                        finish(new Error(jobData.error?.message || t('error.translationFailed')));
+                        break;
+                }
+            };
+            source.onerror = () => {
+                // 连接关闭后 EventSource 会自动重连；已关闭则视为失败
+                if (source.readyState === EventSource.CLOSED) {
+                    finish(new Error('Job status stream failed'));
+                }
+            };
+        });
+
+        const { document_id, document_key, has_glossary } = await waitForJob();
         console.log('Upload successful:', { document_id, document_key, has_glossary });
 
-        // 2. 轮询检查状态，需要考虑术语表处理的状态
+        // 2. 通过服务端推送等待 DeepL 翻译完成，服务端统一轮询上游
         setStatus('translating');
-        let retryCount = 0;
-        const maxRetries = 30;  // 可能需要增加重试次数，因为要等待术语表处理
-
-        const checkStatus = async () => {
-            const response = await fetch(
-                `${API_BASE_URL}/api/translate/${document_id}/status`,
-                {
-                    method: 'POST',
-                    headers: {
-                        'Content-Type': 'application/x-www-form-urlencoded'
-                    },
-                    body: new URLSearchParams({ document_key })
-                }
+        await new Promise<void>((resolve, reject) => {
+            const params = new URLSearchParams({ document_key });
+            const source = new EventSource(
+                `${API_BASE_URL}/api/translate/${document_id}/events?${params}`
             );
-
-            if (!response.ok) {
-                throw new Error('Status check failed');
-            }
-
-            const statusData = await response.json();
-            
-            // 添加对处理阶段的判断
-            switch(statusData.status) {
-                case 'processing_document':
-                    setStatus('processing');
-                    break;
-                case 'extracting_terms':
-                    setStatus('extracting');
-                    break;
-                case 'creating_glossary':
-                    setStatus('creating_glossary');
-                    break;
-                case 'translating':
-                    setStatus('translating');
-                    break;
-                case 'done':
-                    return true;
-                case 'error':
-                    throw new Error(statusData.message || t('error.translationFailed'));
-            }
-            return false;
-        };
-
-        // 修改状态检查循环
-        while (retryCount < maxRetries) {
-            const isDone = await checkStatus();
-            if (isDone) break;
-            
-            retryCount++;
-            await new Promise(resolve => setTimeout(resolve, 2000));
-        }
-
-        if (retryCount >= maxRetries) {
-            throw new Error(t('error.timeout'));
-        }
+            const timeoutId = setTimeout(() => {
+                source.close();
+                reject(new Error(t('error.timeout')));
+            }, 10 * 60 * 1000);
+            const finish = (error?: Error) => {
+                clearTimeout(timeoutId);
+                source.close();
+                if (error) {
+                    reject(error);
+                } else {
+                    resolve();
+                }
+            };
+
+            source.onmessage = (event) => {
+                const statusData = JSON.parse(event.data);
+                switch(statusData.status) {
+                    case 'translating':
+                        setStatus('translating');
+                        break;
+                    case 'done':
+                        finish();
+                        break;
+                    case 'error':
+                        finish(new Error(statusData.message || t('error.translationFailed')));
+                        break;
+                }
+            };
+            source.onerror = () => {
+                // 连接关闭后 EventSource 会自动重连；已关闭则视为失败
+                if (source.readyState === EventSource.CLOSED) {
+                    finish(new Error('Status stream failed'));
+                }
+            };
+        });
 
         // 3. 下载结果
         setStatus('downloading');
@@ -172,7 +219,7 @@ function App() {
                 headers: {
                     'Content-Type': 'application/x-www-form-urlencoded'
                 },
-                body: new URLSearchParams({ document_key })
+                body: new URLSearchParams({ document_key, filename: selectedFile.name })
             }
         );
 
@@ -286,7 +333,7 @@ function App() {
                 >
                   {t('button.translate')}
                 </button>
-                <TranslationStatus status={status} errorMessage={errorMessage} />
+                <TranslationStatus status={status} errorMessage={errorMessage} progress={jobProgress} />
               </>
             )}
           </div>
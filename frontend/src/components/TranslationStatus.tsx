@@ -1,13 +1,14 @@
 // frontend/src/components/TranslationStatus.tsx   翻译状态
 import { useTranslation } from 'react-i18next'
-import type { TranslationStatus as Status } from '../App'
+import type { TranslationStatus as Status, JobProgress } from '../App'
 
 interface TranslationStatusProps {
   status: Status
   errorMessage: string
+  progress?: JobProgress | null
 }
 
-const TranslationStatus = ({ status, errorMessage }: TranslationStatusProps) => {
+const TranslationStatus = ({ status, errorMessage, progress }: TranslationStatusProps) => {
   const { t } = useTranslation()
 
   if (status === 'error' && errorMessage) {
@@ -22,9 +23,19 @@ const TranslationStatus = ({ status, errorMessage }: TranslationStatusProps) =>
     return null
   }
 
+  // 后台任务推送的当前阶段进度，总量未知时只显示状态
+  const percent = progress?.total ? Math.min(100, Math.floor(progress.processed * 100 / progress.total)) : null
+  const remaining = progress?.eta_seconds ? Math.ceil(progress.eta_seconds) : null
+
   return (
     <div className="translation-status">
       <p>{t(`status.${status}`)}</p>
+      {percent !== null && (
+        <p className="translation-progress">
+          {t('status.progress', { percent })}
+          {remaining !== null && ` · ${t('status.remaining', { seconds: remaining })}`}
+        </p>
+      )}
     </div>
   )
 }
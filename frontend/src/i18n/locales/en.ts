@@ -33,7 +33,9 @@ export default {
       error: 'Error: {{message}}',
       processing: 'Processing document...',
       extracting: 'Extracting terms...',
-      creatingGlossary: 'Creating glossary...'
+      creatingGlossary: 'Creating glossary...',
+      progress: '{{percent}}% complete',
+      remaining: 'about {{seconds}}s remaining'
     },
     button: {
       translate: 'Translate Document',
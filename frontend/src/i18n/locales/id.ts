@@ -33,7 +33,9 @@ export default {
       error: 'Kesalahan: {{message}}',
       processing: 'Memproses dokumen...',
       extracting: 'Mengekstrak istilah...',
-      creatingGlossary: 'Membuat glosarium...'
+      creatingGlossary: 'Membuat glosarium...',
+      progress: '{{percent}}% selesai',
+      remaining: 'sekitar {{seconds}} detik lagi'
     },
     button: {
       translate: 'Terjemahkan Dokumen',
@@ -32,7 +32,9 @@ export default {
       error: '错误：{{message}}',
       processing: '正在处理文档...',
       extracting: '正在提取术语...',
-      creatingGlossary: '正在创建术语表...'
+      creatingGlossary: '正在创建术语表...',
+      progress: '已完成 {{percent}}%',
+      remaining: '预计剩余 {{seconds}} 秒'
     },
     button: {
       translate: '文档翻译',